@@ -0,0 +1,114 @@
+"""
+Cache module for the Common Assessment Tool.
+Wraps a Redis connection used to cache read-heavy query results.
+Caching is disabled when REDIS_URL is not set, so every helper becomes a no-op.
+"""
+
+import functools
+import os
+from typing import List, Optional
+
+import orjson
+import redis
+from pydantic import TypeAdapter
+
+#Here is where the cache server is located, e.g. redis://localhost:6379/0
+REDIS_URL = os.getenv("REDIS_URL")
+
+_redis_client = None
+
+def get_redis():
+    """
+    Get the shared Redis client, creating it on first use.
+
+    Returns:
+        redis.Redis: Redis client, or None when caching is disabled
+    """
+    global _redis_client
+    if _redis_client is None and REDIS_URL:
+        _redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=False)
+    return _redis_client
+
+def cache_get(key: str) -> Optional[bytes]:
+    """
+    Read a cached value.
+
+    Args:
+        key (str): Cache key
+
+    Returns:
+        bytes: Cached payload, or None on a miss or when the cache is unavailable
+    """
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        return client.get(key)
+    except redis.RedisError:
+        return None
+
+def cache_set(key: str, value, ttl: int):
+    """
+    Store a value with an expiry.
+
+    Args:
+        key (str): Cache key
+        value (bytes | str): Payload to store
+        ttl (int): Time to live in seconds
+    """
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.setex(key, ttl, value)
+    except redis.RedisError:
+        pass
+
+def cache_delete(*keys: str, patterns=()):
+    """
+    Remove cached values by exact key and by glob pattern.
+
+    Args:
+        keys (str): Exact keys to delete
+        patterns (Iterable[str]): Glob patterns, e.g. "clients:list:*"
+    """
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        if keys:
+            client.delete(*keys)
+        for pattern in patterns:
+            matched = list(client.scan_iter(pattern))
+            if matched:
+                client.unlink(*matched)
+    except redis.RedisError:
+        pass
+
+def redis_cached(key, ttl: int, model):
+    """
+    Cache a function's list result in Redis as JSON.
+    Results are serialized through the given Pydantic model, so ORM rows can be cached;
+    cache hits are returned as plain dicts.
+
+    Args:
+        key (Callable): Builds the cache key from the wrapped function's arguments
+        ttl (int): Time to live in seconds
+        model (type): Pydantic model describing one item of the result list
+    """
+    adapter = TypeAdapter(List[model])
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs)
+            cached = cache_get(cache_key)
+            if cached is not None:
+                return orjson.loads(cached)
+            result = func(*args, **kwargs)
+            if get_redis() is not None:
+                items = adapter.validate_python(result, from_attributes=True)
+                cache_set(cache_key, adapter.dump_json(items), ttl)
+            return result
+        return wrapper
+    return decorator
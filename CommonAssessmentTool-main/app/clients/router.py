@@ -1,9 +1,12 @@
 """
 Router module for client-related endpoints.
 Handles all HTTP requests for client operations including create, read, update, and delete.
+Endpoints are plain functions because the service layer uses a synchronous SQLAlchemy
+session; FastAPI runs them in its threadpool so database waits don't block the event loop.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.auth.router import get_current_user, get_admin_user
@@ -15,23 +18,34 @@ from app.clients.schema import (
     ClientResponse, 
     ClientUpdate, 
     ClientListResponse,
+    ClientSearchCriteria,
     ServiceResponse,
-    ServiceUpdate
+    ServiceUpdate,
+    CaseAssignmentCreate
 )
 
 router = APIRouter(prefix="/clients", tags=["clients"])
 
 @router.get("/", response_model=ClientListResponse)
-async def get_clients(
+def get_clients(
     current_user: User = Depends(get_admin_user), 
     skip: int = Query(default=0, ge=0, description="Number of records to skip"),
     limit: int = Query(default=50, ge=1, le=150, description="Maximum number of records to return"),
     db: Session = Depends(get_db)
 ):
-    return ClientService.get_clients(db, skip, limit)
+    # Rows are already plain dicts of ClientResponse columns, so skip response-model re-validation
+    return ORJSONResponse(ClientService.get_clients(db, skip, limit))
+
+@router.get("/export")
+def export_clients(
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Stream every client as a JSON array, without loading the whole table into memory"""
+    return StreamingResponse(ClientService.stream_clients(db), media_type="application/json")
 
 @router.get("/{client_id}", response_model=ClientResponse)
-async def get_client(
+def get_client(
     client_id: int,
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
@@ -40,65 +54,23 @@ async def get_client(
     return ClientService.get_client(db, client_id)
 
 @router.get("/search/by-criteria", response_model=List[ClientResponse])
-async def get_clients_by_criteria(
-    employment_status: Optional[bool] = None,
-    education_level: Optional[int] = Query(None, ge=1, le=14),
-    age_min: Optional[int] = Query(None, ge=18),
-    gender: Optional[int] = Query(None, ge=1, le=2),
-    work_experience: Optional[int] = Query(None, ge=0),
-    canada_workex: Optional[int] = Query(None, ge=0),
-    dep_num: Optional[int] = Query(None, ge=0),
-    canada_born: Optional[bool] = None,
-    citizen_status: Optional[bool] = None,
-    fluent_english: Optional[bool] = None,
-    reading_english_scale: Optional[int] = Query(None, ge=0, le=10),
-    speaking_english_scale: Optional[int] = Query(None, ge=0, le=10),
-    writing_english_scale: Optional[int] = Query(None, ge=0, le=10),
-    numeracy_scale: Optional[int] = Query(None, ge=0, le=10),
-    computer_scale: Optional[int] = Query(None, ge=0, le=10),
-    transportation_bool: Optional[bool] = None,
-    caregiver_bool: Optional[bool] = None,
-    housing: Optional[int] = Query(None, ge=1, le=10),
-    income_source: Optional[int] = Query(None, ge=1, le=11),
-    felony_bool: Optional[bool] = None,
-    attending_school: Optional[bool] = None,
-    substance_use: Optional[bool] = None,
-    time_unemployed: Optional[int] = Query(None, ge=0),
-    need_mental_health_support_bool: Optional[bool] = None,
+def get_clients_by_criteria(
+    criteria: ClientSearchCriteria = Depends(),
+    skip: int = Query(default=0, ge=0, description="Number of records to skip"),
+    limit: int = Query(default=50, ge=1, le=150, description="Maximum number of records to return"),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Search clients by any combination of criteria"""
     return ClientService.get_clients_by_criteria(
         db,
-        employment_status=employment_status,
-        education_level=education_level,
-        age_min=age_min,
-        gender=gender,
-        work_experience=work_experience,
-        canada_workex=canada_workex,
-        dep_num=dep_num,
-        canada_born=canada_born,
-        citizen_status=citizen_status,
-        fluent_english=fluent_english,
-        reading_english_scale=reading_english_scale,
-        speaking_english_scale=speaking_english_scale,
-        writing_english_scale=writing_english_scale,
-        numeracy_scale=numeracy_scale,
-        computer_scale=computer_scale,
-        transportation_bool=transportation_bool,
-        caregiver_bool=caregiver_bool,
-        housing=housing,
-        income_source=income_source,
-        felony_bool=felony_bool,
-        attending_school=attending_school,
-        substance_use=substance_use,
-        time_unemployed=time_unemployed,
-        need_mental_health_support_bool=need_mental_health_support_bool
+        skip=skip,
+        limit=limit,
+        **criteria.model_dump()
     )
 
 @router.get("/search/by-services", response_model=List[ClientResponse])
-async def get_clients_by_services(
+def get_clients_by_services(
     employment_assistance: Optional[bool] = None,
     life_stabilization: Optional[bool] = None,
     retention_services: Optional[bool] = None,
@@ -106,6 +78,8 @@ async def get_clients_by_services(
     employment_related_financial_supports: Optional[bool] = None,
     employer_financial_supports: Optional[bool] = None,
     enhanced_referrals: Optional[bool] = None,
+    skip: int = Query(default=0, ge=0, description="Number of records to skip"),
+    limit: int = Query(default=50, ge=1, le=150, description="Maximum number of records to return"),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
@@ -118,37 +92,45 @@ async def get_clients_by_services(
         specialized_services=specialized_services,
         employment_related_financial_supports=employment_related_financial_supports,
         employer_financial_supports=employer_financial_supports,
-        enhanced_referrals=enhanced_referrals
+        enhanced_referrals=enhanced_referrals,
+        skip=skip,
+        limit=limit
     )
 
 @router.get("/{client_id}/services", response_model=List[ServiceResponse])
-async def get_client_services(
+def get_client_services(
     client_id: int,
+    skip: int = Query(default=0, ge=0, description="Number of records to skip"),
+    limit: int = Query(default=50, ge=1, le=150, description="Maximum number of records to return"),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Get all services and their status for a specific client, including case worker info"""
-    return ClientService.get_client_services(db, client_id)
+    return ClientService.get_client_services(db, client_id, skip, limit)
 
 @router.get("/search/success-rate", response_model=List[ClientResponse])
-async def get_clients_by_success_rate(
+def get_clients_by_success_rate(
     min_rate: int = Query(70, ge=0, le=100, description="Minimum success rate percentage"),
+    skip: int = Query(default=0, ge=0, description="Number of records to skip"),
+    limit: int = Query(default=50, ge=1, le=150, description="Maximum number of records to return"),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Get clients with success rate above specified threshold"""
-    return ClientService.get_clients_by_success_rate(db, min_rate)
+    return ClientService.get_clients_by_success_rate(db, min_rate, skip, limit)
 
 @router.get("/case-worker/{case_worker_id}", response_model=List[ClientResponse])
-async def get_clients_by_case_worker(
+def get_clients_by_case_worker(
     case_worker_id: int,
+    skip: int = Query(default=0, ge=0, description="Number of records to skip"),
+    limit: int = Query(default=50, ge=1, le=150, description="Maximum number of records to return"),
     current_user: User = Depends(get_current_user), 
     db: Session = Depends(get_db)
 ):
-    return ClientService.get_clients_by_case_worker(db, case_worker_id)
+    return ClientService.get_clients_by_case_worker(db, case_worker_id, skip, limit)
 
 @router.put("/{client_id}", response_model=ClientResponse)
-async def update_client(
+def update_client(
     client_id: int,
     client_data: ClientUpdate,
     current_user: User = Depends(get_admin_user),
@@ -158,7 +140,7 @@ async def update_client(
     return ClientService.update_client(db, client_id, client_data)
 
 @router.put("/{client_id}/services/{user_id}", response_model=ServiceResponse)
-async def update_client_services(
+def update_client_services(
     client_id: int,
     user_id: int,
     service_update: ServiceUpdate,
@@ -168,7 +150,7 @@ async def update_client_services(
     return ClientService.update_client_services(db, client_id, user_id, service_update)
 
 @router.post("/{client_id}/case-assignment", response_model=ServiceResponse)
-async def create_case_assignment(
+def create_case_assignment(
     client_id: int,
     case_worker_id: int = Query(..., description="Case worker ID to assign"),
     current_user: User = Depends(get_admin_user),
@@ -177,8 +159,17 @@ async def create_case_assignment(
     """Create a new case assignment for a client with a case worker"""
     return ClientService.create_case_assignment(db, client_id, case_worker_id)
 
+@router.post("/case-assignments/bulk", response_model=List[ServiceResponse])
+def create_case_assignments(
+    assignments: List[CaseAssignmentCreate],
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Create many case assignments in one transaction, skipping pairs that already exist"""
+    return ClientService.create_case_assignments(db, assignments)
+
 @router.delete("/{client_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_client(
+def delete_client(
     client_id: int,
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
@@ -132,6 +132,36 @@ class ClientUpdate(BaseModel):
     time_unemployed: Optional[int] = Field(None, ge=0)
     need_mental_health_support_bool: Optional[bool] = None
 
+class ClientSearchCriteria(BaseModel):
+    """
+    Query parameters for searching clients by criteria.
+    Every field is optional; only the ones given are used as filters.
+    """
+    employment_status: Optional[bool] = None
+    education_level: Optional[int] = Field(None, ge=1, le=14)
+    age_min: Optional[int] = Field(None, ge=18)
+    gender: Optional[int] = Field(None, ge=1, le=2)
+    work_experience: Optional[int] = Field(None, ge=0)
+    canada_workex: Optional[int] = Field(None, ge=0)
+    dep_num: Optional[int] = Field(None, ge=0)
+    canada_born: Optional[bool] = None
+    citizen_status: Optional[bool] = None
+    fluent_english: Optional[bool] = None
+    reading_english_scale: Optional[int] = Field(None, ge=0, le=10)
+    speaking_english_scale: Optional[int] = Field(None, ge=0, le=10)
+    writing_english_scale: Optional[int] = Field(None, ge=0, le=10)
+    numeracy_scale: Optional[int] = Field(None, ge=0, le=10)
+    computer_scale: Optional[int] = Field(None, ge=0, le=10)
+    transportation_bool: Optional[bool] = None
+    caregiver_bool: Optional[bool] = None
+    housing: Optional[int] = Field(None, ge=1, le=10)
+    income_source: Optional[int] = Field(None, ge=1, le=11)
+    felony_bool: Optional[bool] = None
+    attending_school: Optional[bool] = None
+    substance_use: Optional[bool] = None
+    time_unemployed: Optional[int] = Field(None, ge=0)
+    need_mental_health_support_bool: Optional[bool] = None
+
 class ServiceResponse(BaseModel):
     client_id: int
     user_id: int
@@ -157,6 +187,10 @@ class ServiceUpdate(BaseModel):
     enhanced_referrals: Optional[bool] = None
     success_rate: Optional[int] = Field(None, ge=0, le=100)
 
+class CaseAssignmentCreate(BaseModel):
+    client_id: int
+    case_worker_id: int
+
 class ClientListResponse(BaseModel):
     clients: List[ClientResponse]
     total: int
@@ -3,18 +3,123 @@ Client service module handling all database operations for clients.
 Provides CRUD operations and business logic for client management.
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+import operator
+
+import orjson
+from sqlalchemy.orm import Session, load_only, raiseload
+from sqlalchemy import and_, delete, exists, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from fastapi import HTTPException, status
 from typing import List, Optional, Dict, Any
+from app.database import STRICT_LOADING
 from app.models import Client, ClientCase, User
-from app.clients.schema import ClientUpdate, ServiceUpdate, ServiceResponse
+from app.clients.schema import (
+    CaseAssignmentCreate,
+    ClientResponse,
+    ClientUpdate,
+    ServiceUpdate,
+    ServiceResponse
+)
+from app.cache import cache_get, cache_set, cache_delete, redis_cached
+
+# Cache keys and expiry (seconds) for the paginated client list
+CLIENT_LIST_KEY = "clients:list:{skip}:{limit}"
+CLIENT_LIST_TTL = 60
+CLIENT_COUNT_KEY = "clients:count"
+CLIENT_COUNT_TTL = 300
+
+# Cache keys and expiry (seconds) for per-ID lookups
+CLIENT_SERVICES_KEY = "client:{client_id}:services:{skip}:{limit}"
+CASE_WORKER_CLIENTS_KEY = "caseworker:{case_worker_id}:clients:{skip}:{limit}"
+LOOKUP_TTL = 120
+
+def invalidate_client_list_cache():
+    """Drop every cached client list page and the cached client count"""
+    cache_delete(CLIENT_COUNT_KEY, patterns=["clients:list:*"])
+
+def invalidate_client_services_cache(client_id):
+    """Drop every cached services page for one client"""
+    cache_delete(patterns=[CLIENT_SERVICES_KEY.format(client_id=client_id, skip="*", limit="*")])
+
+def invalidate_case_worker_cache(case_worker_id="*"):
+    """Drop cached client pages for one case worker, or for all of them by default"""
+    cache_delete(patterns=[CASE_WORKER_CLIENTS_KEY.format(case_worker_id=case_worker_id, skip="*", limit="*")])
+
+# Columns exposed through ClientResponse; queries fetch only these so new model columns aren't over-fetched
+CLIENT_RESPONSE_COLUMNS = tuple(getattr(Client, name) for name in ClientResponse.model_fields)
+
+# (search parameter, Client column, comparison) resolved once at import for get_clients_by_criteria
+CRITERIA_FILTERS = (
+    ("employment_status", Client.currently_employed, operator.eq),
+    ("age_min", Client.age, operator.ge),
+    ("gender", Client.gender, operator.eq),
+    ("education_level", Client.level_of_schooling, operator.eq),
+    ("work_experience", Client.work_experience, operator.eq),
+    ("canada_workex", Client.canada_workex, operator.eq),
+    ("dep_num", Client.dep_num, operator.eq),
+    ("canada_born", Client.canada_born, operator.eq),
+    ("citizen_status", Client.citizen_status, operator.eq),
+    ("fluent_english", Client.fluent_english, operator.eq),
+    ("reading_english_scale", Client.reading_english_scale, operator.eq),
+    ("speaking_english_scale", Client.speaking_english_scale, operator.eq),
+    ("writing_english_scale", Client.writing_english_scale, operator.eq),
+    ("numeracy_scale", Client.numeracy_scale, operator.eq),
+    ("computer_scale", Client.computer_scale, operator.eq),
+    ("transportation_bool", Client.transportation_bool, operator.eq),
+    ("caregiver_bool", Client.caregiver_bool, operator.eq),
+    ("housing", Client.housing, operator.eq),
+    ("income_source", Client.income_source, operator.eq),
+    ("felony_bool", Client.felony_bool, operator.eq),
+    ("attending_school", Client.attending_school, operator.eq),
+    ("substance_use", Client.substance_use, operator.eq),
+    ("time_unemployed", Client.time_unemployed, operator.eq),
+    ("need_mental_health_support_bool", Client.need_mental_health_support_bool, operator.eq),
+)
+
+# Service values for a newly assigned case
+DEFAULT_CASE_VALUES = {
+    "employment_assistance": False,
+    "life_stabilization": False,
+    "retention_services": False,
+    "specialized_services": False,
+    "employment_related_financial_supports": False,
+    "employer_financial_supports": False,
+    "enhanced_referrals": False,
+    "success_rate": 0,
+}
+
+def refresh_current_success_rate(db: Session, *client_ids: int):
+    """Recompute the denormalized current_success_rate of the given clients from their cases"""
+    max_rate = (
+        select(func.max(ClientCase.success_rate))
+        .where(ClientCase.client_id == Client.id)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(Client)
+        .where(Client.id.in_(client_ids))
+        .values(current_success_rate=max_rate)
+        .execution_options(synchronize_session=False)
+    )
+
+def client_load_options():
+    """
+    Loader options for queries returning clients.
+    Only ClientResponse columns are fetched and no relationships are loaded, since
+    ClientResponse has none; under STRICT_LOADING any lazy load raises.
+    """
+    options = [load_only(*CLIENT_RESPONSE_COLUMNS, raiseload=STRICT_LOADING)]
+    if STRICT_LOADING:
+        options.append(raiseload("*"))
+    return options
 
 class ClientService:
     @staticmethod
     def get_client(db: Session, client_id: int):
         """Get a specific client by ID"""
-        client = db.query(Client).filter(Client.id == client_id).first()
+        client = db.query(Client).options(*client_load_options()).filter(
+            Client.id == client_id
+        ).first()
         if not client:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -38,10 +143,56 @@ class ClientService:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Limit must be greater than 0"
             )
-        
-        clients = db.query(Client).offset(skip).limit(limit).all()
-        total = db.query(Client).count()
-        return {"clients": clients, "total": total}
+
+        list_key = CLIENT_LIST_KEY.format(skip=skip, limit=limit)
+        cached_page = cache_get(list_key)
+        if cached_page is not None:
+            return orjson.loads(cached_page)
+
+        # Plain Core rows skip ORM identity-map and instrumentation work;
+        # the window count returns the table total alongside the page in one query
+        rows = db.execute(
+            select(*CLIENT_RESPONSE_COLUMNS, func.count().over().label("total"))
+            .order_by(Client.id)
+            .offset(skip)
+            .limit(limit)
+        ).mappings().all()
+        clients = [{key: value for key, value in row.items() if key != "total"} for row in rows]
+
+        if rows:
+            total = rows[0]["total"]
+            cache_set(CLIENT_COUNT_KEY, str(total), CLIENT_COUNT_TTL)
+        else:
+            # Page is past the end, so no row carries the total
+            cached_total = cache_get(CLIENT_COUNT_KEY)
+            if cached_total is not None:
+                total = int(cached_total)
+            else:
+                total = db.scalar(select(func.count(Client.id)))
+                cache_set(CLIENT_COUNT_KEY, str(total), CLIENT_COUNT_TTL)
+
+        page = {"clients": clients, "total": total}
+        cache_set(list_key, orjson.dumps(page), CLIENT_LIST_TTL)
+        return page
+
+    @staticmethod
+    def stream_clients(db: Session, batch_size: int = 100):
+        """
+        Yield every client as chunks of a JSON array.
+        Rows are fetched batch_size at a time, so memory stays bounded by the batch, not the table.
+        """
+        result = db.execute(
+            select(*CLIENT_RESPONSE_COLUMNS)
+            .order_by(Client.id)
+            .execution_options(stream_results=True, yield_per=batch_size)
+        ).mappings()
+
+        yield b"["
+        separator = b""
+        for batch in result.partitions():
+            yield separator + b",".join(orjson.dumps(dict(row)) for row in batch)
+            separator = b","
+        yield b"]"
 
     @staticmethod
     def get_clients_by_criteria(
@@ -69,81 +220,31 @@ class ClientService:
         attending_school: Optional[bool] = None,
         substance_use: Optional[bool] = None,
         time_unemployed: Optional[int] = None,
-        need_mental_health_support_bool: Optional[bool] = None
+        need_mental_health_support_bool: Optional[bool] = None,
+        skip: int = 0,
+        limit: int = 50
     ):
         """Get clients filtered by any combination of criteria"""
-        query = db.query(Client)
-    
-        if education_level is not None and not (1 <= education_level <= 14):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Education level must be between 1 and 14"
-            )
-        
-        if age_min is not None and age_min < 18:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Minimum age must be at least 18"
-            )
-
-        if gender is not None and gender not in [1, 2]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Gender must be 1 or 2"
-            )
+        # Value ranges are validated by ClientSearchCriteria and the table's CHECK constraints
+        criteria = locals()
 
-        # Apply filters for non-None values
-        if employment_status is not None:
-            query = query.filter(Client.currently_employed == employment_status)
-        if age_min is not None:
-            query = query.filter(Client.age >= age_min)
-        if gender is not None:
-            query = query.filter(Client.gender == gender)
-        if education_level is not None:
-            query = query.filter(Client.level_of_schooling == education_level)
-        if work_experience is not None:
-            query = query.filter(Client.work_experience == work_experience)
-        if canada_workex is not None:
-            query = query.filter(Client.canada_workex == canada_workex)
-        if dep_num is not None:
-            query = query.filter(Client.dep_num == dep_num)
-        if canada_born is not None:
-            query = query.filter(Client.canada_born == canada_born)
-        if citizen_status is not None:
-            query = query.filter(Client.citizen_status == citizen_status)
-        if fluent_english is not None:
-            query = query.filter(Client.fluent_english == fluent_english)
-        if reading_english_scale is not None:
-            query = query.filter(Client.reading_english_scale == reading_english_scale)
-        if speaking_english_scale is not None:
-            query = query.filter(Client.speaking_english_scale == speaking_english_scale)
-        if writing_english_scale is not None:
-            query = query.filter(Client.writing_english_scale == writing_english_scale)
-        if numeracy_scale is not None:
-            query = query.filter(Client.numeracy_scale == numeracy_scale)
-        if computer_scale is not None:
-            query = query.filter(Client.computer_scale == computer_scale)
-        if transportation_bool is not None:
-            query = query.filter(Client.transportation_bool == transportation_bool)
-        if caregiver_bool is not None:
-            query = query.filter(Client.caregiver_bool == caregiver_bool)
-        if housing is not None:
-            query = query.filter(Client.housing == housing)
-        if income_source is not None:
-            query = query.filter(Client.income_source == income_source)
-        if felony_bool is not None:
-            query = query.filter(Client.felony_bool == felony_bool)
-        if attending_school is not None:
-            query = query.filter(Client.attending_school == attending_school)
-        if substance_use is not None:
-            query = query.filter(Client.substance_use == substance_use)
-        if time_unemployed is not None:
-            query = query.filter(Client.time_unemployed == time_unemployed)
-        if need_mental_health_support_bool is not None:
-            query = query.filter(Client.need_mental_health_support_bool == need_mental_health_support_bool)
+        # Collect filters for non-None values and apply them in a single WHERE clause
+        conditions = [
+            compare(column, criteria[name])
+            for name, column, compare in CRITERIA_FILTERS
+            if criteria[name] is not None
+        ]
+        query = (
+            select(Client)
+            .options(*client_load_options())
+            .where(*conditions)
+            .order_by(Client.id)
+            .offset(skip)
+            .limit(limit)
+        )
 
         try:
-            return query.all()
+            return db.execute(query).scalars().all()
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -153,20 +254,23 @@ class ClientService:
     @staticmethod
     def get_clients_by_services(
         db: Session,
+        skip: int = 0,
+        limit: int = 50,
         **service_filters: Optional[bool]
     ):
         """
         Get clients filtered by multiple service statuses.
         """
-        query = db.query(Client).join(ClientCase)
+        # The join only filters; a client with several matching cases appears once per case, so DISTINCT drops the duplicates
+        query = db.query(Client).join(ClientCase).options(*client_load_options())
     
-        for service_name, status in service_filters.items():
-            if status is not None:
-                filter_criteria = getattr(ClientCase, service_name) == status
+        for service_name, service_status in service_filters.items():
+            if service_status is not None:
+                filter_criteria = getattr(ClientCase, service_name) == service_status
                 query = query.filter(filter_criteria)
     
         try:
-            return query.all()
+            return query.distinct().order_by(Client.id).offset(skip).limit(limit).all()
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -174,10 +278,20 @@ class ClientService:
             )
 
     @staticmethod
-    def get_client_services(db: Session, client_id: int):
+    @redis_cached(
+        key=lambda db, client_id, skip=0, limit=50: CLIENT_SERVICES_KEY.format(
+            client_id=client_id, skip=skip, limit=limit
+        ),
+        ttl=LOOKUP_TTL,
+        model=ServiceResponse
+    )
+    def get_client_services(db: Session, client_id: int, skip: int = 0, limit: int = 50):
         """Get all services for a specific client with case worker info"""
-        client_cases = db.query(ClientCase).filter(ClientCase.client_id == client_id).all()
-        if not client_cases:
+        client_cases = db.query(ClientCase).filter(
+            ClientCase.client_id == client_id
+        ).order_by(ClientCase.user_id).offset(skip).limit(limit).all()
+        # An empty page past the end is not an error, only a client with no cases at all
+        if not client_cases and skip == 0:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"No services found for client with id {client_id}"
@@ -185,7 +299,7 @@ class ClientService:
         return client_cases
 
     @staticmethod
-    def get_clients_by_success_rate(db: Session, min_rate: int = 70):
+    def get_clients_by_success_rate(db: Session, min_rate: int = 70, skip: int = 0, limit: int = 50):
         """Get clients with success rate at or above the specified percentage"""
         if not (0 <= min_rate <= 100):
             raise HTTPException(
@@ -193,48 +307,64 @@ class ClientService:
                 detail="Success rate must be between 0 and 100"
             )
             
-        return db.query(Client).join(ClientCase).filter(
-            ClientCase.success_rate >= min_rate
-        ).all()
+        return db.query(Client).options(*client_load_options()).filter(
+            Client.current_success_rate >= min_rate
+        ).order_by(Client.id).offset(skip).limit(limit).all()
 
     @staticmethod
-    def get_clients_by_case_worker(db: Session, case_worker_id: int):
+    @redis_cached(
+        key=lambda db, case_worker_id, skip=0, limit=50: CASE_WORKER_CLIENTS_KEY.format(
+            case_worker_id=case_worker_id, skip=skip, limit=limit
+        ),
+        ttl=LOOKUP_TTL,
+        model=ClientResponse
+    )
+    def get_clients_by_case_worker(db: Session, case_worker_id: int, skip: int = 0, limit: int = 50):
         """Get all clients assigned to a specific case worker"""
-        case_worker = db.query(User).filter(User.id == case_worker_id).first()
-        if not case_worker:
+        case_worker_exists = db.query(exists().where(User.id == case_worker_id)).scalar()
+        if not case_worker_exists:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Case worker with id {case_worker_id} not found"
             )
             
-        return db.query(Client).join(ClientCase).filter(
+        return db.query(Client).join(ClientCase).options(
+            *client_load_options()
+        ).filter(
             ClientCase.user_id == case_worker_id
-        ).all()
+        ).distinct().order_by(Client.id).offset(skip).limit(limit).all()
 
     @staticmethod
     def update_client(db: Session, client_id: int, client_update: ClientUpdate):
         """Update a client's information"""
-        client = db.query(Client).filter(Client.id == client_id).first()
-        if not client:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Client with id {client_id} not found"
-            )
-
-        update_data = client_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(client, field, value)
+        update_data = client_update.model_dump(exclude_unset=True)
+        if not update_data:
+            return ClientService.get_client(db, client_id)
 
         try:
+            # Write only the changed columns without loading the row first
+            result = db.execute(
+                update(Client)
+                .where(Client.id == client_id)
+                .values(**update_data)
+                .execution_options(synchronize_session=False)
+            )
             db.commit()
-            db.refresh(client)
-            return client
         except Exception as e:
             db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to update client: {str(e)}"
             )
+
+        if result.rowcount == 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Client with id {client_id} not found"
+            )
+        invalidate_client_list_cache()
+        invalidate_case_worker_cache()
+        return ClientService.get_client(db, client_id)
     
     @staticmethod
     def update_client_services(
@@ -256,13 +386,18 @@ class ClientService:
                     f"Cannot update services for a non-existent case assignment."
             )
 
-        update_data = service_update.dict(exclude_unset=True)
+        update_data = service_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(client_case, field, value)
 
         try:
+            if "success_rate" in update_data:
+                db.flush()
+                refresh_current_success_rate(db, client_id)
             db.commit()
             db.refresh(client_case)
+            invalidate_client_list_cache()
+            invalidate_client_services_cache(client_id)
             return client_case
         except Exception as e:
             db.rollback()
@@ -278,29 +413,29 @@ class ClientService:
         case_worker_id: int
     ):
         """Create a new case assignment"""
-        # Check if client exists
-        client = db.query(Client).filter(Client.id == client_id).first()
-        if not client:
+        # Check client, case worker and existing assignment in one round trip
+        checks = db.execute(select(
+            exists().where(Client.id == client_id).label("client_exists"),
+            exists().where(User.id == case_worker_id).label("case_worker_exists"),
+            exists().where(
+                ClientCase.client_id == client_id,
+                ClientCase.user_id == case_worker_id
+            ).label("case_exists")
+        )).one()
+
+        if not checks.client_exists:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Client with id {client_id} not found"
             )
 
-        # Check if case worker exists
-        case_worker = db.query(User).filter(User.id == case_worker_id).first()
-        if not case_worker:
+        if not checks.case_worker_exists:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Case worker with id {case_worker_id} not found"
             )
-
-        # Check if assignment already exists
-        existing_case = db.query(ClientCase).filter(
-            ClientCase.client_id == client_id,
-            ClientCase.user_id == case_worker_id
-        ).first()
     
-        if existing_case:
+        if checks.case_exists:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Client {client_id} already has a case assigned to case worker {case_worker_id}"
@@ -311,18 +446,16 @@ class ClientService:
             new_case = ClientCase(
                 client_id=client_id,
                 user_id=case_worker_id,
-                employment_assistance=False,
-                life_stabilization=False,
-                retention_services=False,
-                specialized_services=False,
-                employment_related_financial_supports=False,
-                employer_financial_supports=False,
-                enhanced_referrals=False,
-                success_rate=0
+                **DEFAULT_CASE_VALUES
             )
             db.add(new_case)
+            db.flush()
+            refresh_current_success_rate(db, client_id)
             db.commit()
             db.refresh(new_case)
+            invalidate_client_list_cache()
+            invalidate_client_services_cache(client_id)
+            invalidate_case_worker_cache(case_worker_id)
             return new_case
 
         except Exception as e:
@@ -333,29 +466,86 @@ class ClientService:
             )
     
     @staticmethod
-    def delete_client(db: Session, client_id: int):
-        """Delete a client and their associated records"""
-        # First check if client exists
-        client = db.query(Client).filter(Client.id == client_id).first()
-        if not client:
+    def create_case_assignments(db: Session, assignments: List[CaseAssignmentCreate]):
+        """
+        Create many case assignments in one transaction.
+        Pairs that are already assigned are skipped; only newly created cases are returned.
+        """
+        pairs = list(dict.fromkeys((a.client_id, a.case_worker_id) for a in assignments))
+        if not pairs:
+            return []
+        client_ids = {client_id for client_id, _ in pairs}
+        case_worker_ids = {case_worker_id for _, case_worker_id in pairs}
+
+        found_clients = set(db.scalars(select(Client.id).where(Client.id.in_(client_ids))))
+        missing_clients = sorted(client_ids - found_clients)
+        if missing_clients:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Client with id {client_id} not found"
+                detail=f"Clients not found: {missing_clients}"
             )
 
+        found_case_workers = set(db.scalars(select(User.id).where(User.id.in_(case_worker_ids))))
+        missing_case_workers = sorted(case_worker_ids - found_case_workers)
+        if missing_case_workers:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Case workers not found: {missing_case_workers}"
+            )
+
+        cases = [
+            {"client_id": client_id, "user_id": case_worker_id, **DEFAULT_CASE_VALUES}
+            for client_id, case_worker_id in pairs
+        ]
+        # Existing pairs, including ones another request inserts concurrently, are skipped by the
+        # database itself; RETURNING yields only the rows this INSERT actually created
+        insert_new_cases = (
+            sqlite_insert(ClientCase)
+            .on_conflict_do_nothing(index_elements=[ClientCase.client_id, ClientCase.user_id])
+            .returning(*ClientCase.__table__.columns, sort_by_parameter_order=True)
+        )
+
+        try:
+            # One batched INSERT and a single commit for the whole request
+            new_cases = [dict(row) for row in db.execute(insert_new_cases, cases).mappings()]
+            if not new_cases:
+                return []
+            new_client_ids = {case["client_id"] for case in new_cases}
+            refresh_current_success_rate(db, *new_client_ids)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to create case assignments: {str(e)}"
+            )
+
+        invalidate_client_list_cache()
+        for client_id in new_client_ids:
+            invalidate_client_services_cache(client_id)
+        for case_worker_id in {case["user_id"] for case in new_cases}:
+            invalidate_case_worker_cache(case_worker_id)
+        return new_cases
+
+    @staticmethod
+    def delete_client(db: Session, client_id: int):
+        """Delete a client and their associated records"""
         try:
-            # Delete associated client_cases
-            db.query(ClientCase).filter(
-                ClientCase.client_id == client_id
-            ).delete()
-        
-            # Delete the client
-            db.delete(client)
+            # Associated client_cases are removed by the ON DELETE CASCADE foreign key
+            result = db.execute(delete(Client).where(Client.id == client_id))
             db.commit()
-        
         except Exception as e:
             db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to delete client: {str(e)}"
             )
+
+        if result.rowcount == 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Client with id {client_id} not found"
+            )
+        invalidate_client_list_cache()
+        invalidate_client_services_cache(client_id)
+        invalidate_case_worker_cache()
@@ -4,13 +4,33 @@ Handles data cleaning, model predictions, and intervention combinations analysis
 """
 
 # Standard library imports
+import asyncio
+import copy
 import os
+import sys
+import threading
+from collections import OrderedDict
 #import json
-from itertools import product
 
 # Third-party imports
 import pickle
 import numpy as np
+import onnxruntime
+
+try:
+    import lightgbm
+except ImportError:  # The LightGBM backend is optional
+    lightgbm = None
+
+try:
+    from cuml import ForestInference
+except Exception:  # cuML is only installed on machines with a CUDA GPU, and fails to import without the CUDA runtime
+    ForestInference = None
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; top interventions are then selected with numpy
+    njit = None
 
 # Constants
 COLUMN_INTERVENTIONS = [
@@ -22,12 +42,182 @@ COLUMN_INTERVENTIONS = [
     'Employer Financial Supports',
     'Enhanced Referrals for Skills Development'
 ]
+INTERVENTION_NAMES = np.array(COLUMN_INTERVENTIONS)
+# Predictions pass through float32 (ONNX output, ranking buffer), which is only exact to about
+# 7 significant digits, so reported rates are rounded to hide artifacts like 72.20000457763672
+PREDICTION_DECIMALS = 4
+
+# Client fields in the order the model expects them
+FEATURE_COLUMNS = (
+    "age", "gender", "work_experience", "canada_workex", "dep_num",
+    "canada_born", "citizen_status", "level_of_schooling", "fluent_english",
+    "reading_english_scale", "speaking_english_scale", "writing_english_scale",
+    "numeracy_scale", "computer_scale", "transportation_bool", "caregiver_bool",
+    "housing", "income_source", "felony_bool", "attending_school",
+    "currently_employed", "substance_use", "time_unemployed",
+    "need_mental_health_support_bool"
+)
+
+# Text answers from the front end and their numerical values.
+# Yes/no answers, schooling levels, housing situations and income sources share one lookup,
+# which is safe because their keys do not overlap. Keys are interned so lookups with
+# interned strings (e.g. module constants) match on identity before comparing text.
+CATEGORICAL_MAPPINGS = {sys.intern(text): value for text, value in {
+    "": 0, "true": 1, "false": 0, "no": 0, "yes": 1,
+    "No": 0, "Yes": 1,
+    "Grade 0-8": 1, "Grade 9": 2, "Grade 10": 3, "Grade 11": 4,
+    "Grade 12 or equivalent": 5, "OAC or Grade 13": 6,
+    "Some college": 7, "Some university": 8, "Some apprenticeship": 9,
+    "Certificate of Apprenticeship": 10, "Journeyperson": 11,
+    "Certificate/Diploma": 12, "Bachelor's degree": 13,
+    "Post graduate": 14,
+    "Renting-private": 1, "Renting-subsidized": 2,
+    "Boarding or lodging": 3, "Homeowner": 4,
+    "Living with family/friend": 5, "Institution": 6,
+    "Temporary second residence": 7, "Band-owned home": 8,
+    "Homeless or transient": 9, "Emergency hostel": 10,
+    "No Source of Income": 1, "Employment Insurance": 2,
+    "Workplace Safety and Insurance Board": 3,
+    "Ontario Works applied or receiving": 4,
+    "Ontario Disability Support Program applied or receiving": 5,
+    "Dependent of someone receiving OW or ODSP": 6, "Crown Ward": 7,
+    "Employment": 8, "Self-Employment": 9, "Other (specify)": 10
+}.items()}
 
 # Load model
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(CURRENT_DIR, 'model.pkl')
-with open(MODEL_PATH, "rb") as model_file:
-    MODEL = pickle.load(model_file)
+ONNX_MODEL_PATH = os.path.join(CURRENT_DIR, 'model.onnx')
+LIGHTGBM_MODEL_PATH = os.path.join(CURRENT_DIR, 'model.txt')
+
+class OnnxModel:
+    """
+    ONNX Runtime session exposing the same predict interface as the sklearn model.
+    Trees are evaluated by the native runtime instead of sklearn's per-tree Python dispatch.
+    """
+
+    def __init__(self, path):
+        self.session = onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, rows):
+        """
+        Predict success rates for a batch of rows.
+
+        Args:
+            rows (np.array): Feature matrix of shape (n, 31)
+
+        Returns:
+            np.array: Predictions of shape (n,)
+        """
+        features = np.asarray(rows, dtype=np.float32)
+        return self.session.run(None, {self.input_name: features})[0].ravel().astype(np.float64)
+
+class LightGBMModel:
+    """
+    LightGBM booster exposing the same predict interface as the sklearn model.
+    """
+
+    def __init__(self, path):
+        self.booster = lightgbm.Booster(model_file=path)
+
+    def predict(self, rows):
+        """
+        Predict success rates for a batch of rows.
+
+        Args:
+            rows (np.array): Feature matrix of shape (n, 31)
+
+        Returns:
+            np.array: Predictions of shape (n,)
+        """
+        return self.booster.predict(rows, num_threads=1)
+
+class GpuForestModel:
+    """
+    cuML Forest Inference (FIL) model, walking every tree for every row on the GPU.
+    """
+
+    def __init__(self, forest):
+        self.forest = forest
+
+    def predict(self, rows):
+        """
+        Predict success rates for a batch of rows.
+
+        Args:
+            rows (np.array): Feature matrix of shape (n, 31)
+
+        Returns:
+            np.array: Predictions of shape (n,)
+        """
+        features = np.asfortranarray(rows, dtype=np.float32)
+        return np.asarray(self.forest.predict(features)).ravel()
+
+def load_gpu_model():
+    """
+    Load the trained trees into cuML's Forest Inference Library.
+
+    Returns:
+        GpuForestModel: GPU model for the LightGBM booster if present, otherwise the forest
+    """
+    if os.path.exists(LIGHTGBM_MODEL_PATH):
+        model = GpuForestModel(ForestInference.load(
+            LIGHTGBM_MODEL_PATH, model_type="lightgbm", output_class=False, storage_type="sparse"
+        ))
+    else:
+        with open(MODEL_PATH, "rb") as model_file:
+            forest = pickle.load(model_file)
+        model = GpuForestModel(ForestInference.load_from_sklearn(
+            forest, output_class=False, storage_type="sparse"
+        ))
+    #Predict one row so a missing or unusable GPU fails here rather than on a request
+    model.predict(np.zeros((1, len(FEATURE_COLUMNS) + len(COLUMN_INTERVENTIONS)), dtype=np.float32))
+    return model
+
+def load_model():
+    """
+    Load the prediction model.
+    cuML on a GPU is preferred when installed and usable, then a trained LightGBM booster,
+    then the ONNX export, then the pickled forest.
+
+    Returns:
+        Model with a predict method
+    """
+    if ForestInference is not None:
+        try:
+            return load_gpu_model()
+        except Exception as e:
+            print(f"GPU model unavailable, falling back to CPU inference: {e}")
+    if lightgbm is not None and os.path.exists(LIGHTGBM_MODEL_PATH):
+        return LightGBMModel(LIGHTGBM_MODEL_PATH)
+    if os.path.exists(ONNX_MODEL_PATH):
+        return OnnxModel(ONNX_MODEL_PATH)
+    with open(MODEL_PATH, "rb") as model_file:
+        return pickle.load(model_file)
+
+_model = None
+
+def get_model():
+    """
+    Get the shared prediction model, loading it on first use.
+    Importing this module stays cheap, and under a preloading server
+    (e.g. gunicorn --preload) the model loaded in the parent is shared
+    copy-on-write by the forked workers.
+
+    Returns:
+        Model with a predict method
+    """
+    global _model
+    if _model is None:
+        _model = load_model()
+    return _model
+
+def reload_model():
+    """Reload the prediction model from disk and drop results cached from the old one."""
+    global _model
+    _model = load_model()
+    result_cache.clear()
 
 def clean_input_data(input_data):
     """
@@ -39,23 +229,8 @@ def clean_input_data(input_data):
     Returns:
         list: Cleaned and formatted data ready for model input
     """
-    columns = [
-        "age", "gender", "work_experience", "canada_workex", "dep_num",
-        "canada_born", "citizen_status", "level_of_schooling", "fluent_english",
-        "reading_english_scale", "speaking_english_scale", "writing_english_scale",
-        "numeracy_scale", "computer_scale", "transportation_bool", "caregiver_bool",
-        "housing", "income_source", "felony_bool", "attending_school",
-        "currently_employed", "substance_use", "time_unemployed",
-        "need_mental_health_support_bool"
-    ]
-    demographics = {key: input_data[key] for key in columns}
-    output = []
-    for column in columns:
-        value = demographics.get(column, None)
-        if isinstance(value, str):
-            value = convert_text(value)  # Removed 'column' from here as it wasn't used
-        output.append(value)
-    return output
+    values = (input_data[column] for column in FEATURE_COLUMNS)
+    return [convert_text(value) if isinstance(value, str) else value for value in values]
 
 def convert_text(text_data: str):
     """
@@ -67,38 +242,9 @@ def convert_text(text_data: str):
     Returns:
         int: Converted numerical value
     """
-    categorical_mappings = [
-        {
-            "": 0, "true": 1, "false": 0, "no": 0, "yes": 1,
-            "No": 0, "Yes": 1
-        },
-        {
-            "Grade 0-8": 1, "Grade 9": 2, "Grade 10": 3, "Grade 11": 4,
-            "Grade 12 or equivalent": 5, "OAC or Grade 13": 6,
-            "Some college": 7, "Some university": 8, "Some apprenticeship": 9,
-            "Certificate of Apprenticeship": 10, "Journeyperson": 11,
-            "Certificate/Diploma": 12, "Bachelor's degree": 13,
-            "Post graduate": 14
-        },
-        {
-            "Renting-private": 1, "Renting-subsidized": 2,
-            "Boarding or lodging": 3, "Homeowner": 4,
-            "Living with family/friend": 5, "Institution": 6,
-            "Temporary second residence": 7, "Band-owned home": 8,
-            "Homeless or transient": 9, "Emergency hostel": 10
-        },
-        {
-            "No Source of Income": 1, "Employment Insurance": 2,
-            "Workplace Safety and Insurance Board": 3,
-            "Ontario Works applied or receiving": 4,
-            "Ontario Disability Support Program applied or receiving": 5,
-            "Dependent of someone receiving OW or ODSP": 6, "Crown Ward": 7,
-            "Employment": 8, "Self-Employment": 9, "Other (specify)": 10
-        }
-    ]
-    for category in categorical_mappings:
-        if text_data in category:
-            return category[text_data]
+    value = CATEGORICAL_MAPPINGS.get(text_data)
+    if value is not None:
+        return value
 
     return int(text_data) if text_data.isnumeric() else text_data
 
@@ -112,9 +258,9 @@ def create_matrix(row_data):
     Returns:
         np.array: Matrix of all possible intervention combinations
     """
-    data = [row_data.copy() for _ in range(128)]
-    perms = intervention_permutations(7)
-    return np.concatenate((np.array(data), np.array(perms)), axis=1)
+    base = np.asarray(row_data, dtype=np.float32)
+    data = np.broadcast_to(base, (len(INTERVENTION_PERMUTATIONS), base.size))
+    return np.concatenate((data, INTERVENTION_PERMUTATIONS), axis=1)
 
 def intervention_permutations(num):
     """
@@ -126,7 +272,13 @@ def intervention_permutations(num):
     Returns:
         np.array: Matrix of all possible combinations
     """
-    return np.array(list(product([0, 1], repeat=num)))
+    # Row i holds the bits of i, most significant first, matching itertools.product order
+    combinations = np.arange(1 << num, dtype=np.uint32)[:, None]
+    return (combinations >> np.arange(num - 1, -1, -1)) & 1
+
+# Every combination of the 7 interventions, built once and shared read-only by all requests
+INTERVENTION_PERMUTATIONS = intervention_permutations(len(COLUMN_INTERVENTIONS)).astype(np.float32)
+INTERVENTION_PERMUTATIONS.setflags(write=False)
 
 def get_baseline_row(row_data):
     """
@@ -138,8 +290,8 @@ def get_baseline_row(row_data):
     Returns:
         np.array: Baseline row with zeros for interventions
     """
-    base_interventions = np.zeros(7)
-    return np.concatenate((np.array(row_data), base_interventions))
+    base_interventions = np.zeros(7, dtype=np.float32)
+    return np.concatenate((np.asarray(row_data, dtype=np.float32), base_interventions))
 
 def intervention_row_to_names(row_data):
     """
@@ -151,7 +303,7 @@ def intervention_row_to_names(row_data):
     Returns:
         list: Names of active interventions
     """
-    return [COLUMN_INTERVENTIONS[i] for i, value in enumerate(row_data) if value == 1]
+    return INTERVENTION_NAMES[row_data == 1].tolist()
 
 def process_results(baseline_pred, results_matrix):
     """
@@ -165,35 +317,322 @@ def process_results(baseline_pred, results_matrix):
         dict: Processed results with baseline and interventions
     """
     result_list = [
-        (row[-1], intervention_row_to_names(row[:-1]))
+        (round(float(row[-1]), PREDICTION_DECIMALS), intervention_row_to_names(row[:-1]))
         for row in results_matrix
     ]
     return {
-        "baseline": baseline_pred[-1],
+        "baseline": round(float(baseline_pred[-1]), PREDICTION_DECIMALS),
         "interventions": result_list
     }
 
-def interpret_and_calculate(input_data):
+def prepare_prediction_rows(input_data):
     """
-    Main function to process input data and generate intervention recommendations.
+    Build the rows to score for one client: the baseline row followed by
+    every intervention combination.
 
     Args:
         input_data (dict): Raw input data from client
 
     Returns:
-        dict: Processed results with recommendations
+        np.array: Matrix of 129 rows, baseline first
     """
     raw_data = clean_input_data(input_data)
     baseline_row = get_baseline_row(raw_data).reshape(1, -1)
     intervention_rows = create_matrix(raw_data)
-    baseline_prediction = MODEL.predict(baseline_row)
-    intervention_predictions = MODEL.predict(intervention_rows).reshape(-1, 1)
-    result_matrix = np.concatenate((intervention_rows, intervention_predictions), axis=1)
-    result_order = result_matrix[:, -1].argsort()
-    result_matrix = result_matrix[result_order]
-    top_results = result_matrix[-3:, -8:]
+    return np.concatenate((baseline_row, intervention_rows))
+
+# Per-thread ranking buffers, reused across requests
+_ranking_buffers = threading.local()
+
+def get_ranking_buffer(permutations):
+    """
+    Get this thread's buffer of intervention bits plus a prediction column.
+    The bits are copied in once; each request only overwrites the prediction column.
+
+    Args:
+        permutations (np.array): Intervention bits of the scored rows
+
+    Returns:
+        np.array: Buffer of shape (rows, interventions + 1)
+    """
+    if getattr(_ranking_buffers, "permutations", None) is not permutations:
+        buffer = np.empty((len(permutations), permutations.shape[1] + 1), dtype=np.float32)
+        buffer[:, :-1] = permutations
+        _ranking_buffers.buffer = buffer
+        _ranking_buffers.permutations = permutations
+    return _ranking_buffers.buffer
+
+def _select_top_interventions_numpy(permutations, predictions, count):
+    """
+    Pick the best intervention combinations by predicted success rate.
+    Only the intervention bits are needed from the rows, and those are the same for
+    every client, so the shared permutation matrix is paired with the predictions
+    instead of the full feature rows.
+
+    Args:
+        permutations (np.array): Intervention bits of the scored rows
+        predictions (np.array): Predictions for those rows
+        count (int): Number of combinations to keep
+
+    Returns:
+        np.array: Intervention bits followed by the prediction, best combination last;
+            among equal predictions the lower row index ranks higher
+    """
+    results = get_ranking_buffer(permutations)
+    results[:, -1] = predictions
+    # Many combinations score the same, so a stable sort on the negated predictions keeps
+    # tied rows in index order, matching the loop below; there are only 128 rows to sort.
+    # Fancy indexing copies the selected rows, so the buffer is free for the next request
+    top_order = np.argsort(-results[:, -1], kind="stable")[:count]
+    return results[top_order[::-1]]
+
+def _select_top_interventions_loop(permutations, predictions, count):
+    """Single-pass equivalent of _select_top_interventions_numpy, written for Numba to compile."""
+    # Indices of the best rows so far in ascending order of prediction, -1 while unfilled.
+    # A row only displaces strictly lower scores, so among ties the lower index ranks higher
+    top = np.full(count, -1, dtype=np.int64)
+    for index in range(predictions.shape[0]):
+        score = predictions[index]
+        if top[0] >= 0 and score <= predictions[top[0]]:
+            continue
+        position = 0
+        while position + 1 < count and (top[position + 1] < 0 or predictions[top[position + 1]] < score):
+            top[position] = top[position + 1]
+            position += 1
+        top[position] = index
+    results = np.empty((count, permutations.shape[1] + 1), dtype=np.float32)
+    for row in range(count):
+        results[row, :-1] = permutations[top[row]]
+        results[row, -1] = predictions[top[row]]
+    return results
+
+# Both implementations must agree (tests/test_logic.py); the compiled loop is used when Numba is installed
+select_top_interventions = _select_top_interventions_numpy
+if njit is not None:
+    select_top_interventions = njit(cache=True)(_select_top_interventions_loop)
+
+def summarize_predictions(predictions):
+    """
+    Turn the predictions for one client's rows into recommendations.
+
+    Args:
+        predictions (np.array): Model predictions for the rows built by prepare_prediction_rows
+
+    Returns:
+        dict: Processed results with recommendations
+    """
+    baseline_prediction = predictions[:1]
+    top_results = select_top_interventions(INTERVENTION_PERMUTATIONS, predictions[1:], 3)
     return process_results(baseline_prediction, top_results)
 
+def calculate(input_data):
+    """
+    Score a client and generate intervention recommendations, without caching.
+
+    Args:
+        input_data (dict): Raw input data from client
+
+    Returns:
+        dict: Processed results with recommendations
+    """
+    rows = prepare_prediction_rows(input_data)
+    # Score the baseline and every intervention combination in one predict call
+    return summarize_predictions(get_model().predict(rows))
+
+class ResultCache:
+    """
+    Least-recently-used cache of recommendation results, keyed on a client's feature
+    values in FEATURE_COLUMNS order. Unlike functools.lru_cache it can be checked
+    without computing on a miss, so the batched path shares it with the direct one.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, feature_values):
+        """
+        Look up a cached result.
+
+        Args:
+            feature_values (tuple): Feature values in FEATURE_COLUMNS order
+
+        Returns:
+            dict: Cached result, or None on a miss
+
+        Raises:
+            TypeError: If the feature values are unhashable
+        """
+        with self.lock:
+            result = self.results.get(feature_values)
+            if result is not None:
+                self.results.move_to_end(feature_values)
+            return result
+
+    def put(self, feature_values, result):
+        """
+        Store a result, evicting the least recently used one when full.
+
+        Args:
+            feature_values (tuple): Feature values in FEATURE_COLUMNS order
+            result (dict): Processed results with recommendations
+        """
+        with self.lock:
+            self.results[feature_values] = result
+            self.results.move_to_end(feature_values)
+            if len(self.results) > self.maxsize:
+                self.results.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached result."""
+        with self.lock:
+            self.results.clear()
+
+result_cache = ResultCache()
+
+def get_cache_key(input_data):
+    """
+    Get the result cache key for a client's input.
+
+    Args:
+        input_data (dict): Raw input data from client
+
+    Returns:
+        tuple: Feature values in FEATURE_COLUMNS order, or None if they cannot be cached
+    """
+    feature_values = tuple(input_data[column] for column in FEATURE_COLUMNS)
+    try:
+        hash(feature_values)
+    except TypeError:  # Unhashable values cannot be cached
+        return None
+    return feature_values
+
+def interpret_and_calculate(input_data):
+    """
+    Main function to process input data and generate intervention recommendations.
+    Results are cached per distinct set of feature values, so resubmitting the same
+    client skips the model entirely.
+
+    Args:
+        input_data (dict): Raw input data from client
+
+    Returns:
+        dict: Processed results with recommendations
+    """
+    cache_key = get_cache_key(input_data)
+    if cache_key is None:
+        return calculate(input_data)
+    result = result_cache.get(cache_key)
+    if result is None:
+        result = calculate(dict(zip(FEATURE_COLUMNS, cache_key)))
+        result_cache.put(cache_key, result)
+    # Callers get their own copy so the cached result cannot be mutated
+    return copy.deepcopy(result)
+
+class PredictionBatcher:
+    """
+    Coalesces concurrent prediction requests into a single model predict call.
+    Requests arriving within max_wait_ms of each other (up to max_batch of them)
+    are stacked into one matrix, scored together, and split back per request.
+    Results share result_cache with interpret_and_calculate, so cached clients never queue.
+    """
+
+    def __init__(self, max_batch=32, max_wait_ms=5):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        self.worker = None
+        # Futures of queued or in-flight requests, cancelled if the worker is stopped
+        self.pending = set()
+
+    async def interpret_and_calculate(self, input_data):
+        """
+        Batched equivalent of interpret_and_calculate for use from async endpoints.
+
+        Args:
+            input_data (dict): Raw input data from client
+
+        Returns:
+            dict: Processed results with recommendations
+        """
+        cache_key = get_cache_key(input_data)
+        result = result_cache.get(cache_key) if cache_key is not None else None
+        if result is None:
+            result = await self._predict(input_data)
+            if cache_key is not None:
+                result_cache.put(cache_key, result)
+        # Callers get their own copy so the cached result cannot be mutated
+        return copy.deepcopy(result)
+
+    async def _predict(self, input_data):
+        """Queue one client's rows for the next batch and summarize its predictions."""
+        loop = asyncio.get_running_loop()
+        if self.worker is None or self.worker.done() or self.worker.get_loop() is not loop:
+            self.queue = asyncio.Queue()
+            self.worker = loop.create_task(self._run())
+        future = loop.create_future()
+        self.pending.add(future)
+        future.add_done_callback(self.pending.discard)
+        await self.queue.put((prepare_prediction_rows(input_data), future))
+        return summarize_predictions(await future)
+
+    async def aclose(self):
+        """
+        Stop the worker task and wait for it to finish. Call on shutdown;
+        requests still waiting are cancelled, and a later request starts a new worker.
+        """
+        if self.worker is None:
+            return
+        self.worker.cancel()
+        try:
+            await self.worker
+        except asyncio.CancelledError:
+            pass
+        for future in list(self.pending):
+            future.cancel()
+        self.worker = None
+        self.queue = None
+
+    async def _collect(self):
+        """Wait for the first pending request, then gather more until the batch is full or the wait is over."""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        """Score pending requests batch by batch, off the event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Any failure is passed to the waiting requests; the worker keeps serving later batches
+            try:
+                stacked = np.concatenate([rows for rows, _ in batch])
+                # get_model() may load the model on first use, so it runs in the executor too
+                predictions = await loop.run_in_executor(None, lambda: get_model().predict(stacked))
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            start = 0
+            for rows, future in batch:
+                end = start + len(rows)
+                if not future.done():
+                    future.set_result(predictions[start:end])
+                start = end
+
+prediction_batcher = PredictionBatcher()
+
 if __name__ == "__main__":
     test_data = {
         "age": "23", "gender": "1", "work_experience": "1",
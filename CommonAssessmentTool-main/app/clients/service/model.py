@@ -5,19 +5,28 @@ Handles the preparation, training, and saving of the prediction model.
 
 # Standard library imports
 import pickle
+import sys
 
 # Third-party imports
 import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import r2_score
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType
 
-def prepare_models():
+try:
+    import lightgbm
+except ImportError:  # LightGBM is only needed to train the boosted model
+    lightgbm = None
+
+def load_training_data():
     """
-    Prepare and train the Random Forest model using the dataset.
+    Load the dataset and split it into training and held-out test sets.
     
     Returns:
-        RandomForestRegressor: Trained model for predicting success rates
+        tuple: Training features, test features, training targets and test targets
     """
     # Load dataset
     data = pd.read_csv('data_commontool.csv')
@@ -64,17 +73,45 @@ def prepare_models():
     features = np.array(data[all_features])  # Changed from X to features
     targets = np.array(data['success_rate'])  # Changed from y to targets
     # Split the dataset
-    features_train, _, targets_train, _ = train_test_split(  # Removed unused variables
+    return train_test_split(
         features,
         targets,
         test_size=0.2,
         random_state=42
     )
+
+def prepare_models():
+    """
+    Prepare and train the Random Forest model using the dataset.
+    
+    Returns:
+        RandomForestRegressor: Trained model for predicting success rates
+    """
+    features_train, features_test, targets_train, targets_test = load_training_data()
     # Initialize and train the model
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
+    # Fewer, shallower trees keep predict latency down; n_jobs scores trees in parallel
+    model = RandomForestRegressor(n_estimators=50, max_depth=16, n_jobs=-1, random_state=42)
     model.fit(features_train, targets_train)
+    # Check accuracy on the held-out split
+    print(f"Held-out R^2: {r2_score(targets_test, model.predict(features_test)):.3f}")
     return model
 
+def prepare_boosted_model():
+    """
+    Prepare and train a LightGBM gradient boosted model using the dataset.
+    LightGBM scores a batch with its native predictor, which is much faster than
+    walking sklearn tree objects.
+    
+    Returns:
+        lightgbm.Booster: Trained booster for predicting success rates
+    """
+    if lightgbm is None:
+        raise ImportError("lightgbm is required to train the boosted model")
+    features_train, _, targets_train, _ = load_training_data()
+    model = lightgbm.LGBMRegressor(n_estimators=100, num_leaves=31, random_state=42, verbose=-1)
+    model.fit(features_train, targets_train)
+    return model.booster_
+
 def save_model(model, filename="model.pkl"):
     """
     Save the trained model to a file.
@@ -86,6 +123,21 @@ def save_model(model, filename="model.pkl"):
     with open(filename, "wb") as model_file:
         pickle.dump(model, model_file)
 
+def export_onnx(model, filename="model.onnx"):
+    """
+    Export the trained model to ONNX so it can be served by ONNX Runtime.
+    
+    Args:
+        model: Trained model to export
+        filename (str): Name of the file to save the ONNX model to
+    """
+    onnx_model = convert_sklearn(
+        model,
+        initial_types=[('input', FloatTensorType([None, model.n_features_in_]))]
+    )
+    with open(filename, "wb") as model_file:
+        model_file.write(onnx_model.SerializeToString())
+
 def load_model(filename="model.pkl"):
     """
     Load a trained model from a file.
@@ -102,8 +154,13 @@ def load_model(filename="model.pkl"):
 def main():
     """Main function to train and save the model."""
     print("Starting model training...")
-    model = prepare_models()
-    save_model(model)
+    if len(sys.argv) > 1 and sys.argv[1] == "lightgbm":
+        booster = prepare_boosted_model()
+        booster.save_model("model.txt")
+    else:
+        model = prepare_models()
+        save_model(model)
+        export_onnx(model)
     print("Model training completed and saved successfully.")
 
 if __name__ == "__main__":
@@ -3,15 +3,49 @@ Database configuration module for the Common Assessment Tool.
 Handles database connection and session management using SQLAlchemy.
 """
 
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 #Here is where the database is located
 SQLALCHEMY_DATABASE_URL = "sqlite:///./sql_app.db"  
 
+#Raise on any relationship a query did not load explicitly (enable in dev/test to catch N+1 queries)
+STRICT_LOADING = os.getenv("STRICT_LOADING", "0") == "1"
+
 #Open up a connection so that we are able to use the database
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+#Pool sized for concurrent request threads
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    pool_size=10,
+    max_overflow=20
+)
+
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    """
+    Enable foreign key enforcement, which SQLite leaves off by default.
+    Required for ON DELETE CASCADE on client cases.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+def set_sqlite_wal_pragma(dbapi_connection, connection_record):
+    """
+    Use write-ahead logging so readers are not blocked while a write is in progress.
+    With WAL, synchronous=NORMAL only syncs at checkpoints, which is still safe against corruption.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+event.listen(engine, "connect", set_sqlite_pragma)
+event.listen(engine, "connect", set_sqlite_wal_pragma)
 
 #Bind the engine just created
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
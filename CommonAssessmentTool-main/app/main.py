@@ -4,28 +4,43 @@ This module initializes the FastAPI application and includes all routers.
 Handles database initialization and CORS middleware configuration.
 """
 
+import os
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from app import models
 from app.database import engine
+from app.migrations import upgrade_schema
 from app.clients.router import router as clients_router
 from app.auth.router import router as auth_router
 from fastapi.middleware.cors import CORSMiddleware
 
 # Initialize database tables
 models.Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
+
+# Test runs skip the interactive docs and CORS handling, which they never use
+TESTING = os.getenv("TESTING", "0") == "1"
+docs_urls = dict(docs_url=None, redoc_url=None, openapi_url=None) if TESTING else {}
 
 # Create FastAPI application
-app = FastAPI(title="Case Management API", description="API for managing client cases", version="1.0.0")
+app = FastAPI(
+    title="Case Management API",
+    description="API for managing client cases",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    **docs_urls
+)
 
 # Include routers
 app.include_router(auth_router)
 app.include_router(clients_router)
 
 # Configure CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],     # Allows all origins
-    allow_methods=["*"],     # Allows all methods
-    allow_headers=["*"],     # Allows all headers
-    allow_credentials=True,
-)
+if not TESTING:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],     # Allows all origins
+        allow_methods=["*"],     # Allows all methods
+        allow_headers=["*"],     # Allows all headers
+        allow_credentials=True,
+    )
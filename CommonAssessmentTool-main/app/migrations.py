@@ -0,0 +1,74 @@
+"""
+Schema upgrade module for the Common Assessment Tool.
+Brings a database created by an older version of the app up to the current models.
+create_all only creates missing tables, so columns, indexes and foreign keys added
+to existing tables are applied here.
+"""
+
+from sqlalchemy import func, inspect, select, update
+from app.database import Base
+from app.models import Client, ClientCase
+
+def cascade_client_cases(connection):
+    """
+    Rebuild client_cases with ON DELETE CASCADE on client_id.
+    SQLite cannot alter a foreign key, so the table is recreated and its rows copied;
+    cases pointing at clients or users that no longer exist are dropped.
+
+    Args:
+        connection (Connection): Connection inside the upgrade transaction
+    """
+    for index in inspect(connection).get_indexes("client_cases"):
+        connection.exec_driver_sql(f'DROP INDEX "{index["name"]}"')
+    connection.exec_driver_sql("ALTER TABLE client_cases RENAME TO client_cases_old")
+    ClientCase.__table__.create(connection)
+    columns = ", ".join(column.name for column in ClientCase.__table__.columns)
+    connection.exec_driver_sql(
+        f"INSERT INTO client_cases ({columns}) SELECT {columns} FROM client_cases_old "
+        "WHERE client_id IN (SELECT id FROM clients) AND user_id IN (SELECT id FROM users)"
+    )
+    connection.exec_driver_sql("DROP TABLE client_cases_old")
+
+def add_current_success_rate(connection):
+    """
+    Add the denormalized clients.current_success_rate column and fill it from each client's cases.
+
+    Args:
+        connection (Connection): Connection inside the upgrade transaction
+    """
+    connection.exec_driver_sql(
+        "ALTER TABLE clients ADD COLUMN current_success_rate INTEGER "
+        "CHECK (current_success_rate >= 0 AND current_success_rate <= 100)"
+    )
+    max_rate = (
+        select(func.max(ClientCase.success_rate))
+        .where(ClientCase.client_id == Client.id)
+        .scalar_subquery()
+    )
+    connection.execute(update(Client).values(current_success_rate=max_rate))
+
+def upgrade_schema(bind):
+    """
+    Apply schema changes missing from an existing database. Safe to run on every startup.
+
+    Args:
+        bind (Engine): Engine of the database to upgrade
+    """
+    with bind.begin() as connection:
+        inspector = inspect(connection)
+        case_foreign_keys = inspector.get_foreign_keys("client_cases")
+        if not any(
+            foreign_key["referred_table"] == "clients"
+            and foreign_key.get("options", {}).get("ondelete") == "CASCADE"
+            for foreign_key in case_foreign_keys
+        ):
+            cascade_client_cases(connection)
+
+        client_columns = {column["name"] for column in inspector.get_columns("clients")}
+        if "current_success_rate" not in client_columns:
+            add_current_success_rate(connection)
+
+        #Indexes added to the models after the tables were first created
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
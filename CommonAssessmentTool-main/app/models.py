@@ -4,7 +4,7 @@ Contains the Client model for storing client information in the database.
 """
 
 from app.database import Base
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, CheckConstraint, Enum
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, CheckConstraint, Enum, Index
 from sqlalchemy.orm import relationship
 import enum
 
@@ -55,13 +55,21 @@ class Client(Base):
     substance_use = Column(Boolean)
     time_unemployed = Column(Integer, CheckConstraint('time_unemployed >= 0'))
     need_mental_health_support_bool = Column(Boolean)
+    # Highest success_rate across the client's cases, kept in sync by ClientService
+    current_success_rate = Column(Integer, CheckConstraint('current_success_rate >= 0 AND current_success_rate <= 100'), index=True)
 
-    cases = relationship("ClientCase", back_populates="client")
+    # Cases are removed by the database through ON DELETE CASCADE
+    cases = relationship("ClientCase", back_populates="client", passive_deletes=True)
+
+    __table_args__ = (
+        # Most common demographic search combination in by-criteria lookups
+        Index("ix_client_age_gender_edu", "age", "gender", "level_of_schooling"),
+    )
 
 class ClientCase(Base):
     __tablename__ = "client_cases"
 
-    client_id = Column(Integer, ForeignKey("clients.id"), primary_key=True)
+    client_id = Column(Integer, ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
     
     employment_assistance = Column(Boolean)
@@ -75,3 +83,8 @@ class ClientCase(Base):
 
     client = relationship("Client", back_populates="cases")
     user = relationship("User", back_populates="cases")
+
+    # (client_id, user_id) lookups are already covered by the composite primary key
+    __table_args__ = (
+        Index("ix_clientcase_user_id", "user_id"),
+    )
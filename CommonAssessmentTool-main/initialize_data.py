@@ -19,6 +19,7 @@ def initialize_database():
             )
             db.add(admin_user)
             db.commit()
+            admin = admin_user
             print("Admin user created successfully")
         else:
             print("Admin user already exists")
@@ -52,53 +53,39 @@ def initialize_database():
         for col in integer_columns:
             df[col] = pd.to_numeric(df[col], errors='raise')
 
-        # Process each row in CSV
-        for index, row in df.iterrows():
-            # Create client
-            client = Client(
-                age=int(row['age']),
-                gender=int(row['gender']),
-                work_experience=int(row['work_experience']),
-                canada_workex=int(row['canada_workex']),
-                dep_num=int(row['dep_num']),
-                canada_born=bool(row['canada_born']),
-                citizen_status=bool(row['citizen_status']),
-                level_of_schooling=int(row['level_of_schooling']),
-                fluent_english=bool(row['fluent_english']),
-                reading_english_scale=int(row['reading_english_scale']),
-                speaking_english_scale=int(row['speaking_english_scale']),
-                writing_english_scale=int(row['writing_english_scale']),
-                numeracy_scale=int(row['numeracy_scale']),
-                computer_scale=int(row['computer_scale']),
-                transportation_bool=bool(row['transportation_bool']),
-                caregiver_bool=bool(row['caregiver_bool']),
-                housing=int(row['housing']),
-                income_source=int(row['income_source']),
-                felony_bool=bool(row['felony_bool']),
-                attending_school=bool(row['attending_school']),
-                currently_employed=bool(row['currently_employed']),
-                substance_use=bool(row['substance_use']),
-                time_unemployed=int(row['time_unemployed']),
-                need_mental_health_support_bool=bool(row['need_mental_health_support_bool'])
-            )
-            db.add(client)
-            db.commit()
+        client_types = {
+            'age': int, 'gender': int, 'work_experience': int, 'canada_workex': int,
+            'dep_num': int, 'canada_born': bool, 'citizen_status': bool,
+            'level_of_schooling': int, 'fluent_english': bool,
+            'reading_english_scale': int, 'speaking_english_scale': int,
+            'writing_english_scale': int, 'numeracy_scale': int, 'computer_scale': int,
+            'transportation_bool': bool, 'caregiver_bool': bool, 'housing': int,
+            'income_source': int, 'felony_bool': bool, 'attending_school': bool,
+            'currently_employed': bool, 'substance_use': bool, 'time_unemployed': int,
+            'need_mental_health_support_bool': bool
+        }
+        case_types = {
+            'employment_assistance': bool, 'life_stabilization': bool,
+            'retention_services': bool, 'specialized_services': bool,
+            'employment_related_financial_supports': bool,
+            'employer_financial_supports': bool, 'enhanced_referrals': bool,
+            'success_rate': int
+        }
 
-            # Create client_case
-            client_case = ClientCase(
-                client_id=client.id,
-                user_id=admin_user.id,  # Assign to admin
-                employment_assistance=bool(row['employment_assistance']),
-                life_stabilization=bool(row['life_stabilization']),
-                retention_services=bool(row['retention_services']),
-                specialized_services=bool(row['specialized_services']),
-                employment_related_financial_supports=bool(row['employment_related_financial_supports']),
-                employer_financial_supports=bool(row['employer_financial_supports']),
-                enhanced_referrals=bool(row['enhanced_referrals']),
-                success_rate=int(row['success_rate'])
-            )
-            db.add(client_case)
-            db.commit()
+        # Insert all clients in one statement; return_defaults fills in each new id
+        client_records = df[list(client_types)].astype(client_types).to_dict('records')
+        success_rates = df['success_rate'].astype(int).tolist()
+        for record, success_rate in zip(client_records, success_rates):
+            record['current_success_rate'] = success_rate  # Each client starts with a single case
+        db.bulk_insert_mappings(Client, client_records, return_defaults=True)
+
+        # Create one case per client, assigned to admin
+        case_records = df[list(case_types)].astype(case_types).to_dict('records')
+        for record, client_record in zip(case_records, client_records):
+            record['client_id'] = client_record['id']
+            record['user_id'] = admin.id
+        db.bulk_insert_mappings(ClientCase, case_records)
+        db.commit()
 
         print("Database initialization completed successfully!")
 
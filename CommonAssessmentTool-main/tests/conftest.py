@@ -1,20 +1,58 @@
+import os
+from datetime import timedelta
+
+# Fail fast on relationships a query did not load explicitly; must be set before importing the app
+os.environ.setdefault("STRICT_LOADING", "1")
+# Cheap bcrypt hashes for test users; also read at import time
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# No docs routes or CORS middleware on the app under test
+os.environ.setdefault("TESTING", "1")
+# Never read from or write rolled-back test data into a developer's Redis; cache tests install their own stand-in
+os.environ.pop("REDIS_URL", None)
+
+import httpx
 import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+import pytest_asyncio
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
-from app.database import Base, get_db
+from sqlalchemy.pool import StaticPool
+from app.database import Base, get_db, set_sqlite_pragma
 from app.main import app
-from app.auth.router import get_password_hash
+from app.auth.router import create_access_token, get_password_hash
 from app.models import User, UserRole, Client, ClientCase
 
-# Create test database
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+# Load passlib's bcrypt backend while conftest is imported, before any test is timed
+get_password_hash("warmup")
+
+# Create test database in memory. StaticPool keeps the single connection (and so the database)
+# alive and shared with the threadpool that runs the sync endpoints.
+# Each pytest-xdist worker is its own process, so it gets its own database.
+SQLALCHEMY_DATABASE_URL = "sqlite://"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool
+)
+event.listen(engine, "connect", set_sqlite_pragma)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-@pytest.fixture
-def test_db():
-    # Create tables
+# pysqlite's own transaction handling breaks SAVEPOINTs, so let SQLAlchemy emit BEGIN itself
+@event.listens_for(engine, "connect")
+def disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+@event.listens_for(engine, "begin")
+def emit_begin(connection):
+    connection.exec_driver_sql("BEGIN")
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "fresh_db: rebuild and reseed the test database before this test"
+    )
+
+def seed_database():
+    # Rebuild the tables and insert the baseline users, clients and cases
+    Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
     
     db = TestingSessionLocal()
@@ -36,6 +74,15 @@ def test_db():
             role=UserRole.case_worker
         )
         db.add(case_worker)
+
+        # Create an extra admin for token tests
+        temporary_user = User(
+            username="temporary",
+            email="temp@test.com",
+            hashed_password=get_password_hash("temppass123"),
+            role=UserRole.admin
+        )
+        db.add(temporary_user)
         
         # Create test clients
         client1 = Client(
@@ -62,7 +109,8 @@ def test_db():
             currently_employed=False,
             substance_use=False,
             time_unemployed=6,
-            need_mental_health_support_bool=False
+            need_mental_health_support_bool=False,
+            current_success_rate=75
         )
         
         client2 = Client(
@@ -89,7 +137,8 @@ def test_db():
             currently_employed=True,
             substance_use=False,
             time_unemployed=0,
-            need_mental_health_support_bool=False
+            need_mental_health_support_bool=False,
+            current_success_rate=85
         )
         
         db.add(client1)
@@ -126,45 +175,82 @@ def test_db():
         db.add(client_case1)
         db.add(client_case2)
         db.commit()
-        
-        yield db
     finally:
         db.close()
-        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(scope="session")
+def seed_baseline():
+    # Seed once for the whole session; tests share it through test_db's rollback
+    seed_database()
+    yield
+    Base.metadata.drop_all(bind=engine)
 
 @pytest.fixture
-def client(test_db):
-    def override_get_db():
-        try:
-            yield test_db
-        finally:
-            test_db.close()
-    
-    app.dependency_overrides[get_db] = override_get_db
-    yield TestClient(app)
+def test_db(request, seed_baseline):
+    # Run each test inside a transaction that is rolled back afterwards.
+    # Commits from app code only release a SAVEPOINT, so the seed data is never changed
+    # and tests can run in any order. Only tests marked fresh_db pay for a full rebuild.
+    if request.node.get_closest_marker("fresh_db"):
+        seed_database()
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield db
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close()
+
+@pytest_asyncio.fixture
+async def client(test_db):
+    # Requests go straight into the ASGI app, without TestClient's thread and portal
+    app.dependency_overrides[get_db] = lambda: test_db
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as async_client:
+        yield async_client
     app.dependency_overrides.clear()
 
-@pytest.fixture
-def admin_token(client):
-    response = client.post(
-        "/auth/token",
-        data={"username": "testadmin", "password": "testpass123"}
-    )
-    return response.json()["access_token"]
+@pytest.fixture(scope="session")
+def read_cache():
+    # Status and JSON body of read-only requests, keyed by request, kept for the whole session
+    return {}
 
 @pytest.fixture
-def case_worker_token(client):
-    response = client.post(
-        "/auth/token",
-        data={"username": "testworker", "password": "workerpass123"}
-    )
-    return response.json()["access_token"]
+def cached_get(client, read_cache):
+    # GET that reuses an earlier identical response. Only valid for reads of the seed data,
+    # which every test sees unchanged thanks to the per-test rollback.
+    async def get(url, headers=None, params=None):
+        key = (url, tuple(sorted((headers or {}).items())), tuple(sorted((params or {}).items())))
+        if key not in read_cache:
+            response = await client.get(url, headers=headers, params=params)
+            read_cache[key] = (response.status_code, response.json())
+        return read_cache[key]
+    return get
 
-@pytest.fixture
+# Minted once per test process with a lifetime longer than any run, so no test logs in for a token.
+# The seeded users they name survive every test's rollback.
+TOKEN_LIFETIME = timedelta(days=1)
+ADMIN_TOKEN = create_access_token(data={"sub": "testadmin"}, expires_delta=TOKEN_LIFETIME)
+CASE_WORKER_TOKEN = create_access_token(data={"sub": "testworker"}, expires_delta=TOKEN_LIFETIME)
+TEMPORARY_TOKEN = create_access_token(data={"sub": "temporary"}, expires_delta=TOKEN_LIFETIME)
+
+@pytest.fixture(scope="session")
+def admin_token():
+    return ADMIN_TOKEN
+
+@pytest.fixture(scope="session")
+def case_worker_token():
+    return CASE_WORKER_TOKEN
+
+@pytest.fixture(scope="session")
+def temporary_token():
+    return TEMPORARY_TOKEN
+
+@pytest.fixture(scope="session")
 def admin_headers(admin_token):
     return {"Authorization": f"Bearer {admin_token}"}
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def case_worker_headers(case_worker_token):
     return {"Authorization": f"Bearer {case_worker_token}"}
-    
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""
+Assertion helpers shared by the API tests.
+Each assert carries its own message, since pytest only rewrites asserts in test modules and conftest.
+"""
+
+def assert_response(response, status_code, *, json_has=(), detail_has=None):
+    """
+    Check a response's status code and, optionally, its JSON keys and error detail.
+
+    Args:
+        response: HTTP response to check
+        status_code (int): Expected status code
+        json_has (Iterable[str]): Keys the JSON body must contain
+        detail_has (str): Text the error detail must contain
+
+    Returns:
+        The parsed JSON body, or None when the body is empty
+    """
+    assert response.status_code == status_code, (
+        f"Expected status {status_code}, got {response.status_code}: {response.text}"
+    )
+    if not response.content:
+        return None
+    body = response.json()
+    missing = [key for key in json_has if key not in body]
+    assert not missing, f"Missing keys {missing} in {body}"
+    if detail_has is not None:
+        detail = body.get("detail", "")
+        assert detail_has in detail, f"{detail_has!r} not in detail {detail!r}"
+    return body
@@ -0,0 +1,91 @@
+import fnmatch
+
+import pytest
+from fastapi import status
+from sqlalchemy import update
+from app import cache
+from app.models import Client
+from tests.helpers import assert_response
+
+# Every test awaits the async HTTP client
+pytestmark = pytest.mark.asyncio
+
+class InMemoryRedis:
+    """The subset of redis.Redis used by app.cache, backed by a dict"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def scan_iter(self, pattern):
+        return [key for key in list(self.data) if fnmatch.fnmatch(key, pattern)]
+
+    def unlink(self, *keys):
+        self.delete(*keys)
+
+@pytest.fixture
+def redis_store(monkeypatch):
+    store = InMemoryRedis()
+    monkeypatch.setattr(cache, "_redis_client", store)
+    return store
+
+async def test_client_list_cache(client, test_db, admin_headers, redis_store):
+    """Test that the client list is cached on a miss, served on a hit and dropped on a write"""
+    response = await client.get("/clients/", headers=admin_headers)
+    assert_response(response, status.HTTP_200_OK)
+    assert {"clients:list:0:50", "clients:count"} <= set(redis_store.data)
+
+    # A change made behind the service's back is not seen while the page is cached
+    test_db.execute(update(Client).where(Client.id == 1).values(age=40))
+    response = await client.get("/clients/", headers=admin_headers)
+    assert assert_response(response, status.HTTP_200_OK)["clients"][0]["age"] == 25
+
+    response = await client.put("/clients/1", json={"age": 41}, headers=admin_headers)
+    assert_response(response, status.HTTP_200_OK)
+    assert not redis_store.scan_iter("clients:*")
+
+    response = await client.get("/clients/", headers=admin_headers)
+    assert assert_response(response, status.HTTP_200_OK)["clients"][0]["age"] == 41
+
+async def test_client_services_cache(client, admin_headers, redis_store):
+    """Test that a client's cached services are dropped when a service is updated"""
+    response = await client.get("/clients/1/services", headers=admin_headers)
+    assert_response(response, status.HTTP_200_OK)
+    assert "client:1:services:0:50" in redis_store.data
+
+    response = await client.put(
+        "/clients/1/services/1",
+        json={"success_rate": 60},
+        headers=admin_headers
+    )
+    assert_response(response, status.HTTP_200_OK)
+    assert not redis_store.scan_iter("client:1:services:*")
+
+    response = await client.get("/clients/1/services", headers=admin_headers)
+    assert assert_response(response, status.HTTP_200_OK)[0]["success_rate"] == 60
+
+async def test_case_worker_clients_cache(client, admin_headers, redis_store):
+    """Test that a case worker's cached clients are dropped when a case is assigned to them"""
+    response = await client.get("/clients/case-worker/2", headers=admin_headers)
+    assert [found["id"] for found in assert_response(response, status.HTTP_200_OK)] == [2]
+    assert "caseworker:2:clients:0:50" in redis_store.data
+
+    response = await client.post(
+        "/clients/1/case-assignment",
+        params={"case_worker_id": 2},
+        headers=admin_headers
+    )
+    assert_response(response, status.HTTP_200_OK)
+    assert not redis_store.scan_iter("caseworker:2:clients:*")
+
+    response = await client.get("/clients/case-worker/2", headers=admin_headers)
+    assert [found["id"] for found in assert_response(response, status.HTTP_200_OK)] == [1, 2]
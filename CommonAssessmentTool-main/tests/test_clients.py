@@ -1,154 +1,241 @@
 import pytest
 from fastapi import status
+from hypothesis import HealthCheck, given, settings, strategies as st
+from pydantic import ValidationError
+from app.clients.schema import ClientSearchCriteria
+from app.models import Client
+from tests.helpers import assert_response
+
+# Seeded clients' ages and current success rates
+SEEDED_AGES = (25, 30)
+SEEDED_SUCCESS_RATES = (75, 85)
+
+# Property tests run every example against one read-only fixture setup
+property_settings = settings(
+    max_examples=10,
+    suppress_health_check=[HealthCheck.function_scoped_fixture]
+)
 
 # Test GET Operations
-def test_get_clients_unauthorized(client):
+@pytest.mark.asyncio
+async def test_get_clients_unauthorized(client):
     """Test that unauthorized access is prevented"""
-    response = client.get("/clients/")
-    assert response.status_code == status.HTTP_401_UNAUTHORIZED
-
-def test_get_clients_as_admin(client, admin_headers):
-    """Test getting all clients as admin"""
-    response = client.get("/clients/", headers=admin_headers)
-    assert response.status_code == status.HTTP_200_OK
-    data = response.json()
-    assert "clients" in data
-    assert "total" in data
-    assert len(data["clients"]) > 0
-
-def test_get_client_by_id(client, admin_headers):
-    """Test getting specific client"""
-    # Test existing client
-    response = client.get("/clients/1", headers=admin_headers)
-    assert response.status_code == status.HTTP_200_OK
-    assert response.json()["id"] == 1
-    
-    # Test non-existent client
-    response = client.get("/clients/999", headers=admin_headers)
-    assert response.status_code == status.HTTP_404_NOT_FOUND
-
-def test_get_clients_by_criteria(client, admin_headers):
-    """Test searching clients by various criteria"""
-    # Test single criterion
-    response = client.get(
+    response = await client.get("/clients/")
+    assert_response(response, status.HTTP_401_UNAUTHORIZED)
+
+@pytest.mark.asyncio
+class TestReadOnlyClients:
+    """Reads against the unchanged seed data; identical requests share one cached response"""
+
+    async def test_get_clients_as_admin(self, cached_get, admin_headers):
+        """Test getting all clients as admin"""
+        status_code, data = await cached_get("/clients/", headers=admin_headers)
+        assert status_code == status.HTTP_200_OK
+        assert "clients" in data
+        assert "total" in data
+        assert len(data["clients"]) > 0
+
+    @pytest.mark.parametrize("client_id,expected_status", [
+        pytest.param(1, status.HTTP_200_OK, id="existing"),
+        pytest.param(999, status.HTTP_404_NOT_FOUND, id="non_existent"),
+    ])
+    async def test_get_client_by_id(self, cached_get, admin_headers, client_id, expected_status):
+        """Test getting specific client"""
+        status_code, data = await cached_get(f"/clients/{client_id}", headers=admin_headers)
+        assert status_code == expected_status
+        if expected_status == status.HTTP_200_OK:
+            assert data["id"] == client_id
+
+    async def test_get_clients_by_services(self, cached_get, admin_headers):
+        """Test getting clients by service status"""
+        status_code, data = await cached_get(
+            "/clients/search/by-services",
+            params={
+                "employment_assistance": True,
+                "life_stabilization": True
+            },
+            headers=admin_headers
+        )
+        assert status_code == status.HTTP_200_OK
+        assert len(data) > 0
+
+    async def test_get_client_services(self, cached_get, admin_headers):
+        """Test getting services for a specific client"""
+        status_code, services = await cached_get("/clients/1/services", headers=admin_headers)
+        assert status_code == status.HTTP_200_OK
+        assert isinstance(services, list)
+        assert len(services) > 0
+        assert "employment_assistance" in services[0]
+        assert "success_rate" in services[0]
+
+    @property_settings
+    @given(min_rate=st.integers(min_value=0, max_value=100))
+    async def test_get_clients_by_success_rate(self, cached_get, admin_headers, min_rate):
+        """Test getting clients by success rate threshold"""
+        status_code, data = await cached_get(
+            "/clients/search/success-rate",
+            params={"min_rate": min_rate},
+            headers=admin_headers
+        )
+        assert status_code == status.HTTP_200_OK
+        assert len(data) == sum(rate >= min_rate for rate in SEEDED_SUCCESS_RATES)
+
+    async def test_get_clients_by_case_worker(self, cached_get, admin_headers, case_worker_headers):
+        """Test getting clients assigned to a case worker"""
+        # Test as admin
+        status_code, _ = await cached_get("/clients/case-worker/2", headers=admin_headers)
+        assert status_code == status.HTTP_200_OK
+
+        # Test as case worker
+        status_code, _ = await cached_get("/clients/case-worker/2", headers=case_worker_headers)
+        assert status_code == status.HTTP_200_OK
+
+@pytest.mark.asyncio
+async def test_export_clients(client, admin_headers):
+    """Test streaming every client as a JSON array"""
+    response = await client.get("/clients/export", headers=admin_headers)
+    clients = assert_response(response, status.HTTP_200_OK)
+    assert [c["id"] for c in clients] == [1, 2]
+    assert "current_success_rate" not in clients[0]
+
+@pytest.mark.asyncio
+@property_settings
+@given(age_min=st.integers(min_value=18, max_value=100))
+async def test_get_clients_by_age(cached_get, admin_headers, age_min):
+    """Test searching clients by minimum age"""
+    status_code, data = await cached_get(
         "/clients/search/by-criteria",
-        params={"age_min": 25},
+        params={"age_min": age_min},
         headers=admin_headers
     )
-    assert response.status_code == status.HTTP_200_OK
-    assert len(response.json()) > 0
-
-    # Test multiple criteria
-    response = client.get(
+    assert status_code == status.HTTP_200_OK
+    assert len(data) == sum(age >= age_min for age in SEEDED_AGES)
+    assert all(found["age"] >= age_min for found in data)
+
+@pytest.mark.asyncio
+async def test_get_clients_by_criteria(client, admin_headers):
+    """Test searching clients by multiple criteria"""
+    response = await client.get(
         "/clients/search/by-criteria",
         params={
             "age_min": 25,
-            "currently_employed": True,
+            "employment_status": True,
             "gender": 2
         },
         headers=admin_headers
     )
-    assert response.status_code == status.HTTP_200_OK
-
-    # Test invalid criteria
-    response = client.get(
-        "/clients/search/by-criteria",
-        params={"age_min": 15},  # Below minimum age
-        headers=admin_headers
-    )
-    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY  # Changed from 400
+    data = assert_response(response, status.HTTP_200_OK)
+    assert [found["id"] for found in data] == [2]
 
-def test_get_clients_by_services(client, admin_headers):
-    """Test getting clients by service status"""
-    response = client.get(
-        "/clients/search/by-services",
-        params={
-            "employment_assistance": True,
-            "life_stabilization": True
-        },
-        headers=admin_headers
-    )
-    assert response.status_code == status.HTTP_200_OK
-    assert len(response.json()) > 0
-
-def test_get_client_services(client, admin_headers):
-    """Test getting services for a specific client"""
-    response = client.get("/clients/1/services", headers=admin_headers)
-    assert response.status_code == status.HTTP_200_OK
-    services = response.json()
-    assert isinstance(services, list)
-    assert len(services) > 0
-    assert "employment_assistance" in services[0]
-    assert "success_rate" in services[0]
-
-def test_get_clients_by_success_rate(client, admin_headers):
-    """Test getting clients by success rate threshold"""
-    response = client.get(
-        "/clients/search/success-rate",
-        params={"min_rate": 70},
-        headers=admin_headers
-    )
-    assert response.status_code == status.HTTP_200_OK
-    assert len(response.json()) > 0
-
-def test_get_clients_by_case_worker(client, admin_headers, case_worker_headers):
-    """Test getting clients assigned to a case worker"""
-    # Test as admin
-    response = client.get("/clients/case-worker/2", headers=admin_headers)
-    assert response.status_code == status.HTTP_200_OK
-    
-    # Test as case worker
-    response = client.get("/clients/case-worker/2", headers=case_worker_headers)
-    assert response.status_code == status.HTTP_200_OK
+def test_search_criteria_below_minimum_age():
+    """Test that search criteria reject an age below the minimum"""
+    with pytest.raises(ValidationError):
+        ClientSearchCriteria(age_min=15)
 
 # Test UPDATE Operations
-def test_update_client(client, admin_headers):
+@pytest.mark.asyncio
+async def test_update_client(client, admin_headers):
     """Test updating client information"""
     update_data = {
         "age": 26,
         "currently_employed": True,
         "time_unemployed": 0
     }
-    response = client.put(
+    response = await client.put(
         "/clients/1",
         json=update_data,
         headers=admin_headers
     )
-    assert response.status_code == status.HTTP_200_OK
-    updated_client = response.json()
+    updated_client = assert_response(response, status.HTTP_200_OK)
     assert updated_client["age"] == 26
     assert updated_client["currently_employed"] == True
     assert updated_client["time_unemployed"] == 0
 
-# Test Create Case Assignment
-def test_create_case_assignment(client, admin_headers):
-    """Test creating new case assignment"""
-    response = client.post(
-        "/clients/1/case-assignment",
-        params={"case_worker_id": 2},
+async def search_success_rate_ids(client, headers, min_rate):
+    """Return the ids of clients found by a success rate search"""
+    response = await client.get(
+        "/clients/search/success-rate",
+        params={"min_rate": min_rate},
+        headers=headers
+    )
+    return [found["id"] for found in assert_response(response, status.HTTP_200_OK)]
+
+@pytest.mark.asyncio
+async def test_update_client_services_refreshes_success_rate(client, admin_headers):
+    """Test that lowering a case's success rate updates the client's current success rate"""
+    # Client 1's only case (with user 1) is seeded at 75
+    response = await client.put(
+        "/clients/1/services/1",
+        json={"success_rate": 60},
         headers=admin_headers
     )
-    assert response.status_code == status.HTTP_200_OK
+    assert_response(response, status.HTTP_200_OK)
+    assert await search_success_rate_ids(client, admin_headers, 70) == [2]
 
-    # Test duplicate assignment
-    response = client.post(
+@pytest.mark.asyncio
+async def test_case_assignment_keeps_highest_success_rate(client, admin_headers):
+    """Test that a new case at 0% does not lower the client's current success rate"""
+    response = await client.post(
         "/clients/1/case-assignment",
         params={"case_worker_id": 2},
         headers=admin_headers
     )
-    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert_response(response, status.HTTP_200_OK)
+    assert await search_success_rate_ids(client, admin_headers, 70) == [1, 2]
+
+# Test Create Case Assignment
+# Each pair starts unassigned in the test database; the second request must be rejected as a duplicate
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client_id,case_worker_id", [(1, 2), (2, 1)])
+async def test_create_case_assignment(client, admin_headers, client_id, case_worker_id):
+    """Test creating a new case assignment and repeating it"""
+    url = f"/clients/{client_id}/case-assignment"
+    params = {"case_worker_id": case_worker_id}
+    first = await client.post(url, params=params, headers=admin_headers)
+    second = await client.post(url, params=params, headers=admin_headers)
+
+    case = assert_response(first, status.HTTP_200_OK)
+    assert (case["client_id"], case["user_id"]) == (client_id, case_worker_id)
+    assert_response(second, status.HTTP_400_BAD_REQUEST, detail_has="already has a case assigned")
+
+@pytest.mark.asyncio
+async def test_create_case_assignments_bulk(client, admin_headers):
+    """Test creating several case assignments in one request"""
+    response = await client.post(
+        "/clients/case-assignments/bulk",
+        json=[
+            {"client_id": 1, "case_worker_id": 2},
+            {"client_id": 2, "case_worker_id": 1},
+            {"client_id": 1, "case_worker_id": 1}  # Already assigned, skipped
+        ],
+        headers=admin_headers
+    )
+    cases = assert_response(response, status.HTTP_200_OK)
+    created = {(case["client_id"], case["user_id"]) for case in cases}
+    assert created == {(1, 2), (2, 1)}
+    # New cases start at 0% and must not lower either client's current success rate
+    assert await search_success_rate_ids(client, admin_headers, 70) == [1, 2]
+
+    # Test unknown client
+    response = await client.post(
+        "/clients/case-assignments/bulk",
+        json=[{"client_id": 999, "case_worker_id": 2}],
+        headers=admin_headers
+    )
+    assert_response(response, status.HTTP_404_NOT_FOUND)
 
 # Test DELETE Operation
-def test_delete_client(client, admin_headers):
+@pytest.mark.asyncio
+async def test_delete_client(client, test_db, admin_headers):
     """Test deleting a client"""
     # Test successful deletion
-    response = client.delete("/clients/2", headers=admin_headers)
-    assert response.status_code == status.HTTP_204_NO_CONTENT
+    response = await client.delete("/clients/2", headers=admin_headers)
+    assert_response(response, status.HTTP_204_NO_CONTENT)
 
     # Verify client is deleted
-    response = client.get("/clients/2", headers=admin_headers)
-    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert test_db.get(Client, 2) is None
 
     # Test deleting non-existent client
-    response = client.delete("/clients/999", headers=admin_headers)
-    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert test_db.get(Client, 999) is None
+    response = await client.delete("/clients/999", headers=admin_headers)
+    assert_response(response, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+import pytest_asyncio
+from app.clients.service import logic
+
+class BrokenForestInference:
+    """Stands in for cuML installed on a machine without a usable GPU"""
+
+    @staticmethod
+    def load(*args, **kwargs):
+        raise RuntimeError("no CUDA-capable device is detected")
+
+    load_from_sklearn = load
+
+def test_load_model_falls_back_without_gpu(monkeypatch):
+    """Test that a failing cuML load falls through to CPU inference"""
+    monkeypatch.setattr(logic, "ForestInference", BrokenForestInference)
+    model = logic.load_model()
+    assert not isinstance(model, logic.GpuForestModel)
+
+    rows = np.zeros((2, len(logic.FEATURE_COLUMNS) + len(logic.COLUMN_INTERVENTIONS)), dtype=np.float32)
+    assert np.asarray(model.predict(rows)).shape == (2,)
+
+def test_process_results_hides_float32_error():
+    """Test that float32 predictions are reported as the rates the sklearn model gave"""
+    top = np.zeros((1, len(logic.COLUMN_INTERVENTIONS) + 1), dtype=np.float32)
+    top[0, -1] = 72.2
+    results = logic.process_results(np.array([67.2], dtype=np.float32), top)
+    assert results["baseline"] == 67.2
+    assert results["interventions"][0][0] == 72.2
+
+# Every implementation of top-k selection; the compiled one only exists when Numba is installed
+TOP_K_IMPLEMENTATIONS = [logic._select_top_interventions_loop]
+if logic.njit is not None:
+    TOP_K_IMPLEMENTATIONS.append(logic.select_top_interventions)
+
+@pytest.mark.parametrize("implementation", TOP_K_IMPLEMENTATIONS)
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("count", [1, 3, 10])
+def test_select_top_interventions_implementations_agree(implementation, seed, count):
+    """Test that the loop selection picks the same rows in the same order as the numpy one"""
+    permutations = logic.INTERVENTION_PERMUTATIONS
+    # Few distinct scores, so ties are common, as they are with the real model
+    predictions = np.random.default_rng(seed).integers(0, 20, len(permutations)).astype(np.float32)
+    expected = logic._select_top_interventions_numpy(permutations, predictions, count)
+    np.testing.assert_array_equal(implementation(permutations, predictions, count), expected)
+
+@pytest.mark.parametrize("implementation", [logic._select_top_interventions_numpy, *TOP_K_IMPLEMENTATIONS])
+def test_select_top_interventions_breaks_ties_by_row(implementation):
+    """Test that among equal predictions the lower row ranks higher"""
+    permutations = logic.INTERVENTION_PERMUTATIONS
+    predictions = np.zeros(len(permutations), dtype=np.float32)
+    predictions[[5, 40, 90]] = 80
+    predictions[[7, 60]] = 60
+    top = implementation(permutations, predictions, 4)
+    # Best combination last
+    np.testing.assert_array_equal(top[:, :-1], permutations[[7, 90, 40, 5]])
+    np.testing.assert_array_equal(top[:, -1], [60, 80, 80, 80])
+
+# Any valid client input; the scales only need to map through the categorical lookups
+CLIENT_INPUT = {column: "1" for column in logic.FEATURE_COLUMNS}
+
+@pytest.fixture
+def empty_result_cache():
+    logic.result_cache.clear()
+    yield logic.result_cache
+    logic.result_cache.clear()
+
+@pytest_asyncio.fixture
+async def batcher():
+    batcher = logic.PredictionBatcher(max_wait_ms=50)
+    yield batcher
+    await batcher.aclose()
+
+@pytest.mark.asyncio
+async def test_batcher_serves_cached_results(monkeypatch, empty_result_cache, batcher):
+    """Test that a client already scored by interpret_and_calculate is not queued for the model"""
+    expected = logic.interpret_and_calculate(CLIENT_INPUT)
+
+    def unreachable():
+        raise AssertionError("cached result should not reach the model")
+    monkeypatch.setattr(logic, "get_model", unreachable)
+    assert await batcher.interpret_and_calculate(CLIENT_INPUT) == expected
+
+@pytest.mark.asyncio
+async def test_batcher_fails_batch_without_stopping(monkeypatch, empty_result_cache, batcher):
+    """Test that an error while stacking a batch reaches its requests and the worker keeps running"""
+    widths = iter([31, 30])
+    prepare = logic.prepare_prediction_rows
+    # Rows of different widths cannot be stacked into one matrix
+    monkeypatch.setattr(logic, "prepare_prediction_rows", lambda input_data: np.zeros((129, next(widths)), dtype=np.float32))
+    second_input = dict(CLIENT_INPUT, age="2")
+    results = await asyncio.wait_for(asyncio.gather(
+        batcher.interpret_and_calculate(CLIENT_INPUT),
+        batcher.interpret_and_calculate(second_input),
+        return_exceptions=True
+    ), timeout=5)
+    assert all(isinstance(result, ValueError) for result in results)
+
+    monkeypatch.setattr(logic, "prepare_prediction_rows", prepare)
+    result = await asyncio.wait_for(batcher.interpret_and_calculate(CLIENT_INPUT), timeout=5)
+    assert not batcher.worker.done()
+    assert result == logic.calculate(CLIENT_INPUT)
+
+@pytest.mark.asyncio
+async def test_batcher_gets_model_off_event_loop(monkeypatch, empty_result_cache, batcher):
+    """Test that the model is fetched, and so lazily loaded, in the executor rather than on the loop"""
+    model = logic.get_model()
+    model_threads = []
+
+    def get_model():
+        model_threads.append(threading.get_ident())
+        return model
+    monkeypatch.setattr(logic, "get_model", get_model)
+    await batcher.interpret_and_calculate(CLIENT_INPUT)
+    assert model_threads and threading.get_ident() not in model_threads
+
+@pytest.mark.asyncio
+async def test_batcher_aclose_cancels_waiting_requests(monkeypatch, empty_result_cache, batcher):
+    """Test that closing the batcher stops its worker and cancels requests still waiting"""
+    slow = threading.Event()
+    model = logic.get_model()
+    monkeypatch.setattr(logic, "get_model", lambda: slow.wait(5) and model)
+    request = asyncio.ensure_future(batcher.interpret_and_calculate(CLIENT_INPUT))
+    await asyncio.sleep(0.1)
+    worker = batcher.worker
+    await batcher.aclose()
+    slow.set()
+    assert worker.done()
+    with pytest.raises(asyncio.CancelledError):
+        await request
@@ -0,0 +1,53 @@
+from sqlalchemy import create_engine, event, inspect, text
+from app.database import set_sqlite_pragma
+from app.migrations import upgrade_schema
+
+# Tables as created before current_success_rate and the cascading client_cases foreign key
+LEGACY_SCHEMA = (
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR UNIQUE)",
+    "CREATE TABLE clients (id INTEGER PRIMARY KEY, age INTEGER, gender INTEGER, level_of_schooling INTEGER)",
+    """CREATE TABLE client_cases (
+        client_id INTEGER NOT NULL REFERENCES clients (id),
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        employment_assistance BOOLEAN,
+        life_stabilization BOOLEAN,
+        retention_services BOOLEAN,
+        specialized_services BOOLEAN,
+        employment_related_financial_supports BOOLEAN,
+        employer_financial_supports BOOLEAN,
+        enhanced_referrals BOOLEAN,
+        success_rate INTEGER,
+        PRIMARY KEY (client_id, user_id)
+    )""",
+    "INSERT INTO users (id, username) VALUES (1, 'admin'), (2, 'worker')",
+    "INSERT INTO clients (id, age) VALUES (1, 25), (2, 30)",
+    # Client 3 was deleted while foreign keys were not enforced, leaving an orphaned case
+    "INSERT INTO client_cases (client_id, user_id, success_rate) VALUES (1, 1, 40), (1, 2, 75), (2, 1, 90), (3, 1, 10)",
+)
+
+def test_upgrade_legacy_database(tmp_path):
+    """Test upgrading a database created by an older version of the app"""
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    # Written without foreign key enforcement, like the old app
+    legacy_engine = create_engine(url)
+    with legacy_engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.exec_driver_sql(statement)
+    legacy_engine.dispose()
+
+    engine = create_engine(url)
+    event.listen(engine, "connect", set_sqlite_pragma)
+
+    # Running twice checks that an up-to-date database is left alone
+    upgrade_schema(engine)
+    upgrade_schema(engine)
+
+    with engine.begin() as connection:
+        rates = connection.execute(text("SELECT id, current_success_rate FROM clients ORDER BY id")).all()
+        assert rates == [(1, 75), (2, 90)]
+        assert "ix_clients_current_success_rate" in {index["name"] for index in inspect(connection).get_indexes("clients")}
+
+        connection.execute(text("DELETE FROM clients WHERE id = 1"))
+        cases = connection.execute(text("SELECT client_id FROM client_cases ORDER BY client_id")).all()
+        assert cases == [(2,)]
+    engine.dispose()